@@ -0,0 +1,129 @@
+import numpy as np
+
+from equity.heston import HestonModel
+from equity.monte_carlo import MonteCarloResult
+
+
+# ---------------------------
+# Arbre binomial CRR (référence Black–Scholes)
+# ---------------------------
+
+def crr_price(S0: float, K, T: float, r: float, sigma: float, q: float = 0.0,
+              option: str = "put", american: bool = True, N: int = 1000) -> np.ndarray | float:
+    """
+    Arbre de Cox–Ross–Rubinstein à N pas, vectorisé sur les noeuds d'un
+    niveau et sur un vecteur de strikes K (une seule passe arrière).
+    Sert de référence pour le Longstaff–Schwartz en Black–Scholes.
+    """
+    K = np.asarray(K, dtype=float)
+    dt = T / N
+    u = np.exp(sigma * np.sqrt(dt))
+    p = (np.exp((r - q) * dt) - 1.0 / u) / (u - 1.0 / u)
+    if not 0.0 < p < 1.0:
+        raise ValueError("Probabilité risque-neutre hors de ]0, 1[ : augmenter N.")
+    disc = np.exp(-r * dt)
+    sgn = 1.0 if option == "call" else -1.0
+
+    # noeud j du niveau i (j hausses) : S0 u^(2j - i)
+    S = S0 * u ** (2.0 * np.arange(N + 1) - N)
+    V = np.maximum(sgn * np.subtract.outer(S, K), 0.0)
+    for i in range(N - 1, -1, -1):
+        V = disc * (p * V[1:] + (1.0 - p) * V[:-1])
+        if american:
+            S = S[1:] / u
+            V = np.maximum(V, sgn * np.subtract.outer(S, K))
+    return V[0] if V[0].ndim else float(V[0])
+
+
+# ---------------------------
+# Longstaff–Schwartz
+# ---------------------------
+
+def _basis(S: np.ndarray, K: float, v: np.ndarray | None, degree: int) -> np.ndarray:
+    """
+    Régresseurs : puissances de S/K jusqu'à degree, plus v, v^2 et (S/K) v
+    quand la variance est observée (Heston).
+    """
+    x = S / K
+    cols = [x**k for k in range(degree + 1)]
+    if v is not None:
+        cols += [v, v**2, x * v]
+    return np.column_stack(cols)
+
+
+def lsm_price(
+    S_ex: np.ndarray,
+    times: np.ndarray,
+    K: float,
+    r: float,
+    option: str = "put",
+    degree: int = 3,
+    v_ex: np.ndarray | None = None,
+) -> MonteCarloResult:
+    """
+    Longstaff–Schwartz sur des trajectoires observées aux seules dates
+    d'exercice : S_ex (N_paths × nb de dates), times les dates
+    correspondantes (times[0] = 0, times[-1] = T). v_ex (même forme),
+    optionnel, ajoute la variance aux régresseurs.
+
+    Passe arrière : à chaque date, régression par moindres carrés des
+    flux futurs actualisés sur les trajectoires dans la monnaie, puis
+    exercice si la valeur intrinsèque dépasse la continuation estimée.
+    On ne garde qu'un vecteur de flux (mémoire O(N_paths) en plus de S_ex).
+    """
+    times = np.asarray(times, dtype=float)
+    sgn = 1.0 if option == "call" else -1.0
+    cash = np.maximum(sgn * (S_ex[:, -1] - K), 0.0)
+
+    for j in range(S_ex.shape[1] - 2, 0, -1):
+        cash *= np.exp(-r * (times[j + 1] - times[j]))
+        exercise = np.maximum(sgn * (S_ex[:, j] - K), 0.0)
+        itm = exercise > 0
+        if itm.sum() <= degree + 4:
+            continue
+        X = _basis(S_ex[itm, j], K, None if v_ex is None else v_ex[itm, j], degree)
+        coef, *_ = np.linalg.lstsq(X, cash[itm], rcond=None)
+        stop = exercise[itm] > X @ coef
+        idx = np.flatnonzero(itm)[stop]
+        cash[idx] = exercise[idx]
+
+    cash *= np.exp(-r * (times[1] - times[0]))
+    price = cash.mean()
+    stderr = cash.std(ddof=1) / np.sqrt(len(cash))
+    # exercice immédiat en t = 0
+    price = max(price, max(sgn * (S_ex[0, 0] - K), 0.0))
+    return MonteCarloResult(
+        price=price, stderr=stderr, conf_int=(price - 1.96 * stderr, price + 1.96 * stderr), n_paths=len(cash)
+    )
+
+
+def american_mc(
+    model,
+    K: float,
+    T: float,
+    option: str = "put",
+    n_exercise: int = 50,
+    N_steps: int | None = None,
+    N_paths: int = 50000,
+    seed=0,
+    degree: int = 3,
+    **sim_kwargs,
+) -> MonteCarloResult:
+    """
+    Option bermudéenne (n_exercise dates équidistantes, américaine quand
+    n_exercise grandit) sur BlackScholesModel ou HestonModel.
+
+    Seules les dates d'exercice sont stockées (observation_steps), les
+    N_steps pas de simulation (multiple de n_exercise, défaut n_exercise)
+    servant uniquement à la discrétisation. En Heston, la variance aux
+    dates d'exercice entre dans la régression.
+    """
+    N_steps = n_exercise if N_steps is None else N_steps
+    if N_steps % n_exercise:
+        raise ValueError("N_steps doit être un multiple de n_exercise.")
+    ex_steps = np.arange(0, N_steps + 1, N_steps // n_exercise)
+    times = ex_steps * T / N_steps
+
+    out = model.simulate_paths(T, N_steps, N_paths, seed=seed, observation_steps=ex_steps, **sim_kwargs)
+    S_ex, v_ex = out if isinstance(model, HestonModel) else (out, None)
+    return lsm_price(S_ex, times, K, model.r, option, degree, v_ex)
@@ -1,13 +1,324 @@
-import math
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from scipy.stats import norm
-from scipy.optimize import brentq
 
-class BlackScholesModel:
+from equity.simulation import PathSimulator
+
+
+# ---------------------------
+#  Moteur vectorisé (chaînes)
+# ---------------------------
+
+@dataclass
+class BSChainResult:
+    """
+    Prix et Greeks Black–Scholes d'une chaîne d'options complète.
+    Tous les champs ont la forme broadcastée des entrées.
+    Theta est exprimé par année, vega et rho pour une variation de 1 (pas 1%).
+    """
+    call: np.ndarray
+    put: np.ndarray
+    delta_call: np.ndarray
+    delta_put: np.ndarray
+    gamma: np.ndarray
+    vega: np.ndarray
+    theta_call: np.ndarray
+    theta_put: np.ndarray
+    rho_call: np.ndarray
+    rho_put: np.ndarray
+
+
+def _bs_inputs(S, K, T, r, sigma, q):
+    return np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q)))
+
+
+def bs_price(S, K, T, r, sigma, q=0.0, option="call"):
+    """
+    Prix Black–Scholes vectorisé.
+    Comme toutes les fonctions bs_* de ce module, c'est une fonction pure :
+    aucun état partagé, utilisable depuis plusieurs threads.
+    S, K, T, r, sigma, q : scalaires ou tableaux NumPy (broadcasting).
+    option : "call", "put" ou tableau de ces chaînes (même broadcasting).
+    """
+    S, K, T, r, sigma, q = _bs_inputs(S, K, T, r, sigma, q)
+    sig_sqrtT = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma**2) * T) / sig_sqrtT
+    d2 = d1 - sig_sqrtT
+    fwd_S = S * np.exp(-q * T)
+    disc_K = K * np.exp(-r * T)
+
+    is_call = np.asarray(option) == "call"
+    # signe +1 pour un call, -1 pour un put : prix = s*(S e^{-qT} N(s d1) - K e^{-rT} N(s d2))
+    sgn = np.where(is_call, 1.0, -1.0)
+    return sgn * (fwd_S * norm.cdf(sgn * d1) - disc_K * norm.cdf(sgn * d2))
+
+
+def bs_d1(S, K, T, r, sigma, q=0.0):
+    S, K, T, r, sigma, q = _bs_inputs(S, K, T, r, sigma, q)
+    return (np.log(S / K) + (r - q + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+
+
+def bs_delta(S, K, T, r, sigma, q=0.0, option="call"):
+    d1 = bs_d1(S, K, T, r, sigma, q)
+    is_call = np.asarray(option) == "call"
+    return np.exp(-np.asarray(q) * np.asarray(T)) * np.where(is_call, norm.cdf(d1), norm.cdf(d1) - 1.0)
+
+
+def bs_gamma(S, K, T, r, sigma, q=0.0):
+    S, K, T, r, sigma, q = _bs_inputs(S, K, T, r, sigma, q)
+    d1 = bs_d1(S, K, T, r, sigma, q)
+    return np.exp(-q * T) * norm.pdf(d1) / (S * sigma * np.sqrt(T))
+
+
+def bs_vega(S, K, T, r, sigma, q=0.0):
+    S, K, T, r, sigma, q = _bs_inputs(S, K, T, r, sigma, q)
+    d1 = bs_d1(S, K, T, r, sigma, q)
+    return S * np.exp(-q * T) * norm.pdf(d1) * np.sqrt(T)
+
+
+def bs_log_cf(u, T, r, sigma, q=0.0):
+    """
+    Fonction caractéristique de ln(S_T / S0) sous Black–Scholes
+    (sert de référence pour les pricers de Fourier).
+    """
+    u = np.asarray(u)
+    return np.exp(1j * u * (r - q - 0.5 * sigma**2) * T - 0.5 * sigma**2 * u**2 * T)
+
+
+def bs_chain(S, K, T, r, sigma, q=0.0) -> BSChainResult:
+    """
+    Prix call/put et Greeks Black–Scholes en une seule passe vectorisée.
+    Les intermédiaires d1, d2, exp(-qT), exp(-rT), N(.) et n(d1) sont
+    calculés une seule fois et partagés entre toutes les sorties.
+    """
+    S, K, T, r, sigma, q = _bs_inputs(S, K, T, r, sigma, q)
+    sqrtT = np.sqrt(T)
+    sig_sqrtT = sigma * sqrtT
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma**2) * T) / sig_sqrtT
+    d2 = d1 - sig_sqrtT
+
+    fwd_S = S * np.exp(-q * T)
+    disc_K = K * np.exp(-r * T)
+    N_d1, N_d2 = norm.cdf(d1), norm.cdf(d2)
+    N_md1, N_md2 = norm.cdf(-d1), norm.cdf(-d2)
+    n_d1 = norm.pdf(d1)
+
+    theta_common = -fwd_S * n_d1 * sigma / (2.0 * sqrtT)
+
+    return BSChainResult(
+        call=fwd_S * N_d1 - disc_K * N_d2,
+        put=disc_K * N_md2 - fwd_S * N_md1,
+        delta_call=fwd_S / S * N_d1,
+        delta_put=-fwd_S / S * N_md1,
+        gamma=fwd_S / S * n_d1 / (S * sig_sqrtT),
+        vega=fwd_S * n_d1 * sqrtT,
+        theta_call=theta_common - r * disc_K * N_d2 + q * fwd_S * N_d1,
+        theta_put=theta_common + r * disc_K * N_md2 - q * fwd_S * N_md1,
+        rho_call=T * disc_K * N_d2,
+        rho_put=-T * disc_K * N_md2,
+    )
+
+
+# ---------------------------
+#  Vol implicite vectorisée
+# ---------------------------
+
+@dataclass
+class ImpliedVolResult:
+    """
+    Résultat d'une inversion de vol implicite sur une chaîne.
+      - iv : vols implicites (NaN là où l'inversion n'a pas convergé)
+      - converged : masque booléen de convergence
+      - n_iter : nombre d'itérations effectuées
+    """
+    iv: np.ndarray
+    converged: np.ndarray
+    n_iter: int
+
+
+def _bs_price_vega(S, K, T, r, sigma, q, sgn):
+    sqrtT = np.sqrt(T)
+    sig_sqrtT = sigma * sqrtT
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma**2) * T) / sig_sqrtT
+    d2 = d1 - sig_sqrtT
+    fwd_S = S * np.exp(-q * T)
+    price = sgn * (fwd_S * norm.cdf(sgn * d1) - K * np.exp(-r * T) * norm.cdf(sgn * d2))
+    vega = fwd_S * norm.pdf(d1) * sqrtT
+    return price, vega
+
+
+def implied_vol_batch(
+    price,
+    S,
+    K,
+    T,
+    r,
+    q=0.0,
+    option="call",
+    tol: float = 1e-8,
+    max_iter: int = 100,
+    sigma_min: float = 1e-6,
+    sigma_max: float = 5.0,
+    price_tol=None,
+) -> ImpliedVolResult:
+    """
+    Inverse Black–Scholes sur tout un tableau de prix en une fois.
+
+    - point de départ : approximation rationnelle de Corrado–Miller
+      (calculée sur le call équivalent par parité) ;
+    - itérations de Newton vectorisées, avec un intervalle [lo, hi]
+      maintenu pour chaque option : si le pas de Newton sort de l'intervalle
+      (ou si la vega est quasi nulle), on fait une bissection à la place ;
+    - convergence quand le pas en vol (ou l'intervalle) passe sous tol
+      ET que l'écart de prix |prix modèle - prix cible| est sous
+      price_tol ; un pas de Newton minuscule avec un écart de prix encore
+      grand (vega quasi nulle) passe en bissection. Par défaut,
+      price_tol = tol S e^{-qT} max(1, sqrt(T)) : l'écart de prix que
+      laisse un pas en vol de tol, vega <= 0,4 S e^{-qT} sqrt(T).
+
+    Les prix hors des bornes de non-arbitrage (valeur intrinsèque actualisée,
+    S e^{-qT} pour un call, K e^{-rT} pour un put) ne sont pas inversés :
+    iv = NaN et converged = False.
+    """
+    price, S, K, T, r, q, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (price, S, K, T, r, q)),
+        np.asarray(option) == "call",
+    )
+    sgn = np.where(is_call, 1.0, -1.0)
+
+    fwd_S = S * np.exp(-q * T)
+    disc_K = K * np.exp(-r * T)
+    lower = np.maximum(sgn * (fwd_S - disc_K), 0.0)
+    upper = np.where(is_call, fwd_S, disc_K)
+
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(price) & (T > 0) & (price > lower) & (price < upper)
+
+    iv = np.full(price.shape, np.nan)
+    converged = np.zeros(price.shape, dtype=bool)
+
+    idx = np.flatnonzero(valid)
+    if idx.size == 0:
+        return ImpliedVolResult(iv=iv, converged=converged, n_iter=0)
+
+    p, s, k, t, rr, qq, sg = (a.ravel()[idx] for a in (price, S, K, T, r, q, sgn))
+    fs, dk = fwd_S.ravel()[idx], disc_K.ravel()[idx]
+    if price_tol is None:
+        p_tol = tol * fs * np.maximum(1.0, np.sqrt(t))
+    else:
+        p_tol = np.broadcast_to(np.asarray(price_tol, dtype=float), price.shape).ravel()[idx]
+
+    # On inverse toujours l'option hors de la monnaie (parité call/put) :
+    # la valeur temps y est tout le prix, ce qui conditionne bien le problème.
+    otm_sg = np.where(fs < dk, 1.0, -1.0)
+    p = p + (sg - otm_sg) / 2.0 * (dk - fs)
+    sg = otm_sg
+
+    # --- Corrado–Miller sur le call équivalent ---
+    c = np.where(sg > 0, p, p + fs - dk)
+    half_moneyness = 0.5 * (fs - dk)
+    inner = (c - half_moneyness) ** 2 - (fs - dk) ** 2 / np.pi
+    sig = (np.sqrt(2.0 * np.pi / t) / (fs + dk)) * (c - half_moneyness + np.sqrt(np.maximum(inner, 0.0)))
+    sig = np.where(np.isfinite(sig) & (sig > sigma_min) & (sig < sigma_max), sig, 0.3)
+
+    lo = np.full(idx.size, sigma_min)
+    hi = np.full(idx.size, sigma_max)
+    done = np.zeros(idx.size, dtype=bool)
+
+    n_iter = 0
+    for n_iter in range(1, max_iter + 1):
+        act = np.flatnonzero(~done)
+        if act.size == 0:
+            n_iter -= 1
+            break
+
+        sa = sig[act]
+        model, vega = _bs_price_vega(s[act], k[act], t[act], rr[act], sa, qq[act], sg[act])
+        diff = model - p[act]
+
+        # Mise à jour de l'intervalle : le prix est croissant en sigma
+        lo[act] = np.where(diff < 0, sa, lo[act])
+        hi[act] = np.where(diff > 0, sa, hi[act])
+
+        with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+            newton = sa - diff / vega
+        inside = np.isfinite(newton) & (newton > lo[act]) & (newton < hi[act])
+        small_step = inside & (np.abs(newton - sa) <= tol)
+        price_ok = np.abs(diff) <= p_tol[act]
+        # pas minuscule mais prix encore loin (vega quasi nulle) : bissection
+        use_newton = inside & ~(small_step & ~price_ok)
+        new_sig = np.where(use_newton, newton, 0.5 * (lo[act] + hi[act]))
+
+        # Critère : pas de Newton (ou largeur de l'intervalle) sous tol, et écart de prix sous price_tol
+        ok = ((small_step | (hi[act] - lo[act] <= tol)) & price_ok) | (diff == 0)
+        sig[act] = np.where(ok, np.where(inside, newton, sa), new_sig)
+        done[act] = ok
+
+    # Solution collée au bord de [sigma_min, sigma_max] : pas de racine dans l'intervalle
+    done &= (sig > sigma_min + tol) & (sig < sigma_max - tol)
+    out_iv = np.where(done, sig, np.nan)
+    iv.ravel()[idx] = out_iv
+    converged.ravel()[idx] = done
+    return ImpliedVolResult(iv=iv, converged=converged, n_iter=n_iter)
+
+
+def implied_vol_parallel(
+    price,
+    S,
+    K,
+    T,
+    r,
+    q=0.0,
+    option="call",
+    n_workers: int = 4,
+    chunk_size: int | None = None,
+    **solver_kwargs,
+) -> ImpliedVolResult:
+    """
+    implied_vol_batch découpé en blocs de chunk_size options (par défaut un
+    bloc par worker), inversés en parallèle dans un ThreadPoolExecutor (les
+    ufuncs NumPy/SciPy relâchent le GIL sur les gros tableaux). Le noyau
+    étant pur, aucun verrou n'est nécessaire.
+    """
+    price, S, K, T, r, q, option = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (price, S, K, T, r, q)), np.asarray(option)
+    )
+    flat = [a.ravel() for a in (price, S, K, T, r, q, option)]
+    n = flat[0].size
+    if chunk_size is None:
+        chunk_size = max(1, -(-n // n_workers))
+    bounds = [(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+
+    def solve(b):
+        lo, hi = b
+        p, s, k, t, rr, qq, opt = (a[lo:hi] for a in flat)
+        return implied_vol_batch(p, s, k, t, rr, qq, option=opt, **solver_kwargs)
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        parts = list(pool.map(solve, bounds))
+
+    if not parts:
+        return ImpliedVolResult(iv=np.full(price.shape, np.nan), converged=np.zeros(price.shape, dtype=bool), n_iter=0)
+    return ImpliedVolResult(
+        iv=np.concatenate([res.iv for res in parts]).reshape(price.shape),
+        converged=np.concatenate([res.converged for res in parts]).reshape(price.shape),
+        n_iter=max(res.n_iter for res in parts),
+    )
+
+
+def _out(x):
+    # 0-d -> scalaire NumPy, sinon tableau
+    return x[()] if np.ndim(x) == 0 else x
+
+
+class BlackScholesModel(PathSimulator):
     """
     Modèle Black–Scholes classique en taux continus.
     SDE:
         dS_t = S_t * (r - q) dt + S_t * sigma dW_t
+    Simulation (simulate_paths, simulate_terminal, simulate_observed,
+    iter_path_blocks) : voir equity.simulation.PathSimulator.
     """
 
     def __init__(self, spot: float, rate: float, volatility: float, dividend_yield: float = 0.0):
@@ -19,66 +330,67 @@ class BlackScholesModel:
     # ---------------------------
     #     Prix Black–Scholes
     # ---------------------------
+    # Toutes les méthodes délèguent aux fonctions pures bs_* : l'instance
+    # n'est jamais modifiée et peut être partagée entre threads.
     def d1(self, K, T):
-        return (math.log(self.S0 / K) + (self.r - self.q + 0.5 * self.sigma**2) * T) / (self.sigma * math.sqrt(T))
+        return _out(bs_d1(self.S0, K, T, self.r, self.sigma, self.q))
 
     def d2(self, K, T):
-        return self.d1(K, T) - self.sigma * math.sqrt(T)
+        return self.d1(K, T) - self.sigma * np.sqrt(T)
 
     def call_price(self, K, T):
-        d1, d2 = self.d1(K, T), self.d2(K, T)
-        return self.S0 * math.exp(-self.q * T) * norm.cdf(d1) - K * math.exp(-self.r * T) * norm.cdf(d2)
+        return _out(bs_price(self.S0, K, T, self.r, self.sigma, self.q, option="call"))
 
     def put_price(self, K, T):
-        d1, d2 = self.d1(K, T), self.d2(K, T)
-        return K * math.exp(-self.r * T) * norm.cdf(-d2) - self.S0 * math.exp(-self.q * T) * norm.cdf(-d1)
+        return _out(bs_price(self.S0, K, T, self.r, self.sigma, self.q, option="put"))
 
     # ---------------------------
     #         Greeks
     # ---------------------------
     def delta(self, K, T, option="call"):
-        d1 = self.d1(K, T)
-        if option == "call":
-            return math.exp(-self.q * T) * norm.cdf(d1)
-        else:
-            return math.exp(-self.q * T) * (norm.cdf(d1) - 1)
+        return _out(bs_delta(self.S0, K, T, self.r, self.sigma, self.q, option=option))
 
     def gamma(self, K, T):
-        d1 = self.d1(K, T)
-        return math.exp(-self.q * T) * norm.pdf(d1) / (self.S0 * self.sigma * math.sqrt(T))
+        return _out(bs_gamma(self.S0, K, T, self.r, self.sigma, self.q))
 
     def vega(self, K, T):
-        d1 = self.d1(K, T)
-        return self.S0 * math.exp(-self.q * T) * norm.pdf(d1) * math.sqrt(T)
+        return _out(bs_vega(self.S0, K, T, self.r, self.sigma, self.q))
+
+    def chain(self, K, T) -> BSChainResult:
+        """
+        Prix et Greeks pour des tableaux de strikes / maturités (broadcasting),
+        en une seule passe. Voir bs_chain.
+        """
+        return bs_chain(self.S0, K, T, self.r, self.sigma, self.q)
 
     # ---------------------------
     #   Implied volatility
     # ---------------------------
-    def implied_vol(self, market_price, K, T):
-        def f(sig):
-            self.sigma = sig
-            return self.call_price(K, T) - market_price
+    def implied_vol(self, market_price, K, T, option="call"):
+        res = implied_vol_batch(market_price, self.S0, K, T, self.r, self.q, option=option)
+        return _out(res.iv)
 
-        try:
-            return brentq(f, 1e-6, 3.0)
-        except:
-            return float("nan")
+    def implied_vols(self, market_prices, K, T, option="call", n_workers: int = 1) -> ImpliedVolResult:
+        """
+        Inversion d'une chaîne complète ; n_workers > 1 répartit les blocs
+        sur un pool de threads (même instance, sans copie ni mutation).
+        """
+        if n_workers > 1:
+            return implied_vol_parallel(market_prices, self.S0, K, T, self.r, self.q, option=option,
+                                        n_workers=n_workers)
+        return implied_vol_batch(market_prices, self.S0, K, T, self.r, self.q, option=option)
 
     # ---------------------------
     #  Simulation de trajectoires
     # ---------------------------
-    def simulate_paths(self, T, N_steps=252, N_paths=10000, seed=42):
-        np.random.seed(seed)
+    def _stepper(self, T, N_steps, N_paths):
+        """Pas log-normal exact (PathSimulator) : var_dt = sigma^2 dt."""
         dt = T / N_steps
-        increments = np.random.normal(size=(N_paths, N_steps))
-        S = np.zeros((N_paths, N_steps + 1))
-        S[:, 0] = self.S0
-
         drift = (self.r - self.q - 0.5 * self.sigma**2) * dt
         vol = self.sigma * np.sqrt(dt)
 
-        for t in range(1, N_steps + 1):
-            Z = increments[:, t - 1]
-            S[:, t] = S[:, t - 1] * np.exp(drift + vol * Z)
+        def step(t, log_S, Z):
+            log_S += drift + vol * Z[0]
+            return log_S, vol**2, None
 
-        return S
+        return step, 1, None
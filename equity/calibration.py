@@ -1,10 +1,14 @@
 # equity/calibration.py
+import time
 import numpy as np
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict
 from scipy.optimize import least_squares
 
-from equity.black_scholes import BlackScholesModel
+from equity.black_scholes import bs_price, bs_vega, implied_vol_batch
 from equity.heston import HestonModel, HestonParams
+from equity.heston_analytic import heston_call_prices
 
 
 # ---------------------------
@@ -31,16 +35,11 @@ def calibrate_bs_iv(K, T, market_iv, spot, r):
         sigma = float(sig[0])
         if sigma <= 0:
             return 1e6 * np.ones_like(iv)
-        bs = BlackScholesModel(spot, r, sigma)
-        model_iv = []
-        for k in K:
-            # On passe par le prix BS puis on recalcule une IV pour être cohérent
-            price = bs.call_price(k, T)
-            iv_model_k = bs.implied_vol(price, k, T)
-            if not np.isfinite(iv_model_k) or iv_model_k <= 0:
-                iv_model_k = sigma  # fallback
-            model_iv.append(iv_model_k)
-        model_iv = np.array(model_iv)
+        # On passe par le prix BS puis on recalcule une IV pour être cohérent
+        # (noyau pur et vectorisé : aucun modèle construit par strike)
+        prices = bs_price(spot, K, T, r, sigma)
+        model_iv = implied_vol_batch(prices, spot, K, T, r).iv
+        model_iv = np.where(np.isfinite(model_iv) & (model_iv > 0), model_iv, sigma)  # fallback
         return model_iv - iv
 
     res = least_squares(residuals, np.array([0.2]), bounds=(1e-4, 5.0))
@@ -51,29 +50,59 @@ def calibrate_bs_iv(K, T, market_iv, spot, r):
 # Heston : helper IV
 # ---------------------------
 
-def _heston_iv(model: HestonModel, K: float, T: float) -> float:
+def _heston_iv(model: HestonModel, K: float, T: float, seed=0) -> float:
     """
     Approximation rapide d'une IV Heston :
-      - price_call_mc
+      - price_call_mc (schéma QE, peu de pas)
       - puis inversion via BS.
+    seed : graine ou SeedSequence propre au strike.
     Si ça plante, renvoie np.nan (géré par la calibration).
     """
     try:
-        price = model.price_call_mc(K, T, N_steps=100, N_paths=5000)
+        price = model.price_call_mc(K, T, N_steps=25, N_paths=5000, scheme="qe", seed=seed)
     except Exception:
         return np.nan
 
     if price <= 0 or not np.isfinite(price):
         return np.nan
 
-    # volatilité de base pour l'inversion
-    bs = BlackScholesModel(model.S0, model.r, 0.2)
-    iv = bs.implied_vol(price, K, T)
+    iv = float(implied_vol_batch(price, model.S0, K, T, model.r, model.q).iv)
     if not np.isfinite(iv) or iv <= 0:
         return np.nan
     return iv
 
 
+# ---------------------------
+# Heston : pricing CF pour la calibration
+# ---------------------------
+
+def _x_to_params(x) -> HestonParams:
+    """
+    x = (kappa, theta, sigma, rho_raw, v0), avec rho = tanh(rho_raw).
+    x peut être une matrice (P, 5) : les champs sont alors des colonnes (P, 1).
+    """
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 1:
+        kappa, theta, sigma_v, rho_raw, v0 = x
+    else:
+        kappa, theta, sigma_v, rho_raw, v0 = (x[:, [i]] for i in range(5))
+    return HestonParams(kappa=kappa, theta=theta, sigma=sigma_v, rho=np.tanh(rho_raw), v0=v0)
+
+
+def _heston_cf_jacobian(x, K, T, spot, r, q, n_nodes, rel_step=1e-5):
+    """
+    Jacobienne d(prix)/dx par différences centrées, les 10 jeux de
+    paramètres bumpés étant évalués en une seule passe vectorisée
+    (la grille de quadrature est partagée entre strikes et bumps).
+    Renvoie une matrice (len(K), 5).
+    """
+    x = np.asarray(x, dtype=float)
+    h = rel_step * np.maximum(np.abs(x), 0.1)
+    bumps = np.concatenate([np.diag(h), -np.diag(h)])            # (10, 5)
+    prices = heston_call_prices(spot, K, T, r, q, _x_to_params(x + bumps), n_nodes=n_nodes)
+    return ((prices[:5] - prices[5:]) / (2.0 * h[:, None])).T
+
+
 # ---------------------------
 # Calibrer Heston
 # ---------------------------
@@ -86,13 +115,18 @@ def calibrate_heston(
     r: float,
     q: float = 0.0,
     initial: HestonParams | None = None,
+    method: str = "cf",
+    n_nodes: int = 128,
 ) -> HestonParams:
     """
     Calibration Heston (kappa, theta, sigma, rho, v0)
     par moindres carrés sur un smile (K, IV).
 
-    ATTENTION: c'est une calibration approximative basée sur
-    une inversion MC -> IV BS, ce n'est pas la formule fermée.
+    method="cf" (défaut) : formule semi-analytique (heston_call_prices),
+        ajustement sur les prix pondérés par 1/vega de marché (≈ erreur en
+        IV sans réinversion), jacobienne vectorisée. Déterministe et rapide.
+    method="mc" : ancienne calibration approximative par inversion
+        MC -> IV BS (lente et bruitée, conservée pour comparaison).
     """
 
     K = np.asarray(K, dtype=float)
@@ -109,6 +143,15 @@ def calibrate_heston(
     if initial is None:
         initial = HestonParams(kappa=1.0, theta=0.04, sigma=0.5, rho=-0.5, v0=0.04)
 
+    if method == "cf":
+        return _calibrate_heston_cf(K, T, iv, spot, r, q, initial, n_nodes)
+    if method != "mc":
+        raise ValueError(f"Méthode de calibration inconnue : {method}")
+
+    # Un flux indépendant par strike, identique d'une itération à l'autre
+    # (nombres aléatoires communs : objectif lisse en x)
+    streams = np.random.SeedSequence(0).spawn(len(K))
+
     def residuals(x):
         kappa, theta, sigma_v, rho_raw, v0 = x
 
@@ -120,7 +163,7 @@ def calibrate_heston(
         params = HestonParams(kappa=kappa, theta=theta, sigma=sigma_v, rho=rho, v0=v0)
         model = HestonModel(spot, r, params, q)
 
-        model_iv = np.array([_heston_iv(model, k, T) for k in K])
+        model_iv = np.array([_heston_iv(model, k, T, seed=ss) for k, ss in zip(K, streams)])
 
         # Si des IV modèles sont NaN / inf → renvoyer un gros résidu mais FINI
         if not np.all(np.isfinite(model_iv)):
@@ -154,3 +197,200 @@ def calibrate_heston(
         rho=float(rho_fit),
         v0=float(v0_fit),
     )
+
+
+def _heston_x0_and_bounds(initial: HestonParams):
+    x0 = np.array(
+        [
+            initial.kappa,
+            initial.theta,
+            initial.sigma,
+            np.arctanh(np.clip(initial.rho, -0.999, 0.999)),
+            initial.v0,
+        ]
+    )
+    bounds_lower = [1e-4, 1e-6, 1e-4, -5.0, 1e-6]
+    bounds_upper = [10.0, 2.0, 5.0, 5.0, 2.0]
+    return np.clip(x0, bounds_lower, bounds_upper), (bounds_lower, bounds_upper)
+
+
+def _calibrate_heston_cf(K, T, iv, spot, r, q, initial: HestonParams, n_nodes: int) -> HestonParams:
+    """
+    Calibration Heston sur les prix (formule de Lewis), résidus pondérés
+    par la vega BS de marché : (C_model - C_mkt) / vega ≈ IV_model - IV_mkt.
+    """
+    market_prices = bs_price(spot, K, T, r, iv, q, option="call")
+    vega = np.maximum(bs_vega(spot, K, T, r, iv, q), 1e-4 * spot)
+    w = 1.0 / vega
+
+    def residuals(x):
+        model = heston_call_prices(spot, K, T, r, q, _x_to_params(x), n_nodes=n_nodes)
+        return w * (model - market_prices)
+
+    def jac(x):
+        return w[:, None] * _heston_cf_jacobian(x, K, T, spot, r, q, n_nodes)
+
+    x0, bounds = _heston_x0_and_bounds(initial)
+    res = least_squares(residuals, x0, jac=jac, method="trf", bounds=bounds)
+
+    kappa_fit, theta_fit, sigma_fit, rho_raw_fit, v0_fit = res.x
+    return HestonParams(
+        kappa=float(kappa_fit),
+        theta=float(theta_fit),
+        sigma=float(sigma_fit),
+        rho=float(np.tanh(rho_raw_fit)),
+        v0=float(v0_fit),
+    )
+
+
+# ---------------------------
+# Calibration Heston globale (toutes maturités)
+# ---------------------------
+
+@dataclass
+class HestonSurfaceCalibration:
+    """
+    Résultat d'une calibration Heston jointe sur toute la surface :
+      - params : jeu unique de paramètres
+      - rmse_by_T : RMSE en vol implicite par maturité
+      - elapsed : temps de calibration (secondes, horloge murale)
+      - n_evals : nombre d'évaluations (résidus + jacobienne) de la surface
+    """
+    params: HestonParams
+    rmse_by_T: Dict[float, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+    n_evals: int = 0
+
+
+def _heston_slice_prices(args):
+    """
+    Prix Heston d'une tranche (maturité) pour un lot de paramètres (P, 5).
+    Une seule évaluation de la CF pour tous les strikes et tous les jeux de
+    paramètres. Fonction de module pour pouvoir être envoyée à un process pool.
+    """
+    x_batch, K, T, spot, r, q, n_nodes = args
+    return heston_call_prices(spot, K, T, r, q, _x_to_params(x_batch), n_nodes=n_nodes)
+
+
+class _HestonSurfaceObjective:
+    """
+    Résidus et jacobienne empilés sur toutes les maturités.
+
+    Pour chaque itéré x, la base et les 10 bumps de la jacobienne sont
+    pricés ensemble (une évaluation de CF par maturité) et mis en cache :
+    least_squares appelle fun(x) puis jac(x) au même point, la seconde
+    requête ne coûte rien.
+    """
+
+    def __init__(self, slices, spot, r, q, n_nodes, pool=None, rel_step=1e-5, cache_size=4):
+        self.slices = slices
+        self.spot, self.r, self.q = spot, r, q
+        self.n_nodes = n_nodes
+        self.pool = pool
+        self.rel_step = rel_step
+        self.cache_size = cache_size
+        self._cache: Dict[bytes, tuple] = {}
+        self.n_evals = 0
+
+    def _evaluate(self, x):
+        key = np.asarray(x, dtype=float).tobytes()
+        if key in self._cache:
+            return self._cache[key]
+
+        h = self.rel_step * np.maximum(np.abs(x), 0.1)
+        x_batch = np.vstack([x, x + np.diag(h), x - np.diag(h)])        # (11, 5)
+        tasks = [(x_batch, sl["K"], sl["T"], self.spot, self.r, self.q, self.n_nodes) for sl in self.slices]
+        if self.pool is not None:
+            all_prices = list(self.pool.map(_heston_slice_prices, tasks))
+        else:
+            all_prices = [_heston_slice_prices(t) for t in tasks]
+        self.n_evals += 1
+
+        resid, jac = [], []
+        for sl, prices in zip(self.slices, all_prices):
+            resid.append(sl["w"] * (prices[0] - sl["price"]))
+            jac.append(sl["w"][:, None] * ((prices[1:6] - prices[6:11]) / (2.0 * h[:, None])).T)
+        out = (np.concatenate(resid), np.vstack(jac))
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = out
+        return out
+
+    def residuals(self, x):
+        return self._evaluate(x)[0]
+
+    def jacobian(self, x):
+        return self._evaluate(x)[1]
+
+
+def calibrate_heston_surface(
+    surface,
+    spot: float,
+    r: float,
+    q: float = 0.0,
+    initial: HestonParams | None = None,
+    n_workers: int = 1,
+    n_nodes: int = 128,
+    min_points: int = 3,
+) -> HestonSurfaceCalibration:
+    """
+    Calibre un seul jeu HestonParams sur toutes les maturités d'une VolSurface.
+
+    Résidus : (C_model - C_mkt) / vega_mkt pour chaque (K, T), empilés.
+    Les tranches sont évaluées en lot (CF partagée entre strikes et bumps,
+    cache par itéré) et, si n_workers > 1, réparties sur un ProcessPoolExecutor.
+    Les maturités avec moins de min_points points valides sont ignorées.
+    """
+    t0 = time.perf_counter()
+
+    slices = []
+    for T in surface.maturities:
+        smile = surface.smile(T)
+        K = smile["K"].to_numpy(dtype=float)
+        iv = smile["iv"].to_numpy(dtype=float)
+        mask = np.isfinite(K) & np.isfinite(iv) & (K > 0) & (iv > 0)
+        K, iv = K[mask], iv[mask]
+        if T <= 0 or len(K) < min_points:
+            continue
+        vega = np.maximum(bs_vega(spot, K, T, r, iv, q), 1e-4 * spot)
+        slices.append(
+            {"T": float(T), "K": K, "iv": iv, "price": bs_price(spot, K, T, r, iv, q, option="call"), "w": 1.0 / vega}
+        )
+
+    if not slices:
+        raise ValueError("Aucune maturité exploitable pour la calibration Heston globale.")
+
+    if initial is None:
+        initial = HestonParams(kappa=1.0, theta=0.04, sigma=0.5, rho=-0.5, v0=0.04)
+    x0, bounds = _heston_x0_and_bounds(initial)
+
+    pool = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        objective = _HestonSurfaceObjective(slices, spot, r, q, n_nodes, pool=pool)
+        res = least_squares(objective.residuals, x0, jac=objective.jacobian, method="trf", bounds=bounds)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    params = _x_to_params(res.x)
+    params = HestonParams(
+        kappa=float(params.kappa),
+        theta=float(params.theta),
+        sigma=float(params.sigma),
+        rho=float(params.rho),
+        v0=float(params.v0),
+    )
+
+    rmse_by_T = {}
+    for sl in slices:
+        model_prices = heston_call_prices(spot, sl["K"], sl["T"], r, q, params, n_nodes=n_nodes)
+        model_iv = implied_vol_batch(model_prices, spot, sl["K"], sl["T"], r, q).iv
+        rmse_by_T[sl["T"]] = float(np.sqrt(np.nanmean((model_iv - sl["iv"]) ** 2)))
+
+    return HestonSurfaceCalibration(
+        params=params,
+        rmse_by_T=rmse_by_T,
+        elapsed=time.perf_counter() - t0,
+        n_evals=objective.n_evals,
+    )
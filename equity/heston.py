@@ -1,5 +1,17 @@
 import numpy as np
-from dataclasses import dataclass
+from functools import partial
+from dataclasses import dataclass, replace
+from scipy.stats import norm
+
+from equity.black_scholes import BlackScholesModel
+from equity.monte_carlo import (
+    MonteCarloResult,
+    monte_carlo_pricer,
+    parallel_monte_carlo_pricer,
+    european_call_payoff,
+    european_put_payoff,
+)
+from equity.simulation import PathSimulator, evolve_paths, make_rng
 
 @dataclass
 class HestonParams:
@@ -10,7 +22,95 @@ class HestonParams:
     v0: float        # variance initiale
 
 
-class HestonModel:
+# ---------------------------
+# Pas de schéma (un pas de temps, vectorisé sur les trajectoires)
+# ---------------------------
+
+def _euler_step(log_S, v, Z1, Z2, dt, r, q, params: HestonParams):
+    """
+    Euler (troncature de la variance à 1e-8), schéma historique du modèle.
+    Z1, Z2 : normales indépendantes (spot, variance).
+    """
+    kappa, theta, sigma, rho = params.kappa, params.theta, params.sigma, params.rho
+    Zv = rho * Z1 + np.sqrt(1 - rho**2) * Z2
+
+    v_pos = np.maximum(v, 0)
+    v_new = v + kappa * (theta - v) * dt + sigma * np.sqrt(v_pos) * np.sqrt(dt) * Zv
+    v_new = np.maximum(v_new, 1e-8)
+
+    mean, var = log_spot_step_moments("euler", v, v_new, dt, r, q, params)
+    return log_S + mean + np.sqrt(var) * Z1, v_new
+
+
+def _qe_step(log_S, v, Z1, Z2, dt, r, q, params: HestonParams, psi_c: float = 1.5):
+    """
+    Schéma Quadratic-Exponential d'Andersen (2008) pour la variance, et
+    discrétisation de ln S par la règle trapézoïdale (gamma1 = gamma2 = 1/2).
+    Z2 pilote la variance (U = N(Z2) dans le régime exponentiel), Z1 la
+    partie du spot indépendante de la variance.
+    """
+    kappa, theta, sigma, rho = params.kappa, params.theta, params.sigma, params.rho
+    e = np.exp(-kappa * dt)
+
+    m = theta + (v - theta) * e
+    s2 = v * sigma**2 * e * (1 - e) / kappa + theta * sigma**2 * (1 - e) ** 2 / (2 * kappa)
+    psi = s2 / m**2
+
+    # Régime quadratique (psi <= psi_c) : v' = a (b + Z)^2
+    quad = psi <= psi_c
+    inv_psi = 2.0 / np.where(quad, psi, 1.0)
+    b2 = np.maximum(inv_psi - 1 + np.sqrt(inv_psi) * np.sqrt(np.maximum(inv_psi - 1, 0.0)), 0.0)
+    a = m / (1 + b2)
+    v_quad = a * (np.sqrt(b2) + Z2) ** 2
+
+    # Régime exponentiel (psi > psi_c) : masse en 0 puis loi exponentielle
+    p = (psi - 1) / (psi + 1)
+    beta = (1 - p) / m
+    U = norm.cdf(Z2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v_exp = np.where(U <= p, 0.0, np.log((1 - p) / (1 - U)) / beta)
+
+    v_new = np.where(quad, v_quad, v_exp)
+
+    mean, var = log_spot_step_moments("qe", v, v_new, dt, r, q, params)
+    return log_S + mean + np.sqrt(var) * Z1, v_new
+
+
+def log_spot_step_moments(scheme: str, v, v_new, dt, r, q, params: HestonParams):
+    """
+    Moyenne et variance de l'incrément de ln S sur un pas, sachant la
+    variance en début de pas v (et en fin de pas v_new pour QE) : ln S y
+    est gaussien, Z1 étant la seule source d'aléa restante.
+      - Euler : ((r - q - v/2) dt, v dt) ;
+      - QE : ((r - q) dt + K0 + K1 v + K2 v_new, K3 (v + v_new)), règle
+        trapézoïdale d'Andersen.
+    """
+    if scheme == "euler":
+        return (r - q - 0.5 * v) * dt, v * dt
+    kappa, theta, sigma, rho = params.kappa, params.theta, params.sigma, params.rho
+    K0 = -rho * kappa * theta * dt / sigma
+    K1 = 0.5 * dt * (kappa * rho / sigma - 0.5) - rho / sigma
+    K2 = 0.5 * dt * (kappa * rho / sigma - 0.5) + rho / sigma
+    K3 = 0.5 * dt * (1 - rho**2)
+    return (r - q) * dt + K0 + K1 * v + K2 * v_new, K3 * (v + v_new)
+
+
+_SCHEMES = {"euler": _euler_step, "qe": _qe_step}
+
+
+class HestonModel(PathSimulator):
+    """
+    Heston : dS/S = (r - q) dt + sqrt(v) dW1, dv = kappa (theta - v) dt
+    + sigma sqrt(v) dW2, d<W1, W2> = rho dt. Simulation commune
+    (equity.simulation.PathSimulator) avec l'option scheme :
+      - "euler" : Euler avec troncature (biaisé, il faut ~200+ pas)
+      - "qe"    : Quadratic-Exponential d'Andersen, quasi sans biais
+                  avec 10 à 20 pas par an
+    Les simulations renvoient (S, v) (matrices, ou vecteurs pour les
+    valeurs terminales) ; iter_path_blocks ne donne que S.
+    """
+    _model_kwargs = ("scheme",)
+
     def __init__(self, S0, r, params: HestonParams, q=0.0):
         self.S0 = S0
         self.r = r
@@ -18,45 +118,130 @@ class HestonModel:
         self.params = params
 
     # ---------------------------
-    # Simulation Heston (Euler)
+    # Simulation Heston
     # ---------------------------
-    def simulate_paths(self, T, N_steps=252, N_paths=20000, seed=0):
-        np.random.seed(seed)
-        dt = T / N_steps
+    def _stepper(self, T, N_steps, N_paths, scheme="euler", control_vol=None, log_S_cv=None):
+        """
+        Pas (ln S, v) du schéma choisi ; var_dt = v_t dt (variance en début
+        de pas) pour les observateurs, état observé : v.
 
-        kappa, theta, sigma, rho, v0 = (
-            self.params.kappa,
-            self.params.theta,
-            self.params.sigma,
-            self.params.rho,
-            self.params.v0,
-        )
-
-        S = np.zeros((N_paths, N_steps + 1))
-        v = np.zeros((N_paths, N_steps + 1))
-        S[:, 0] = self.S0
-        v[:, 0] = v0
-
-        for t in range(1, N_steps + 1):
-            Z1 = np.random.normal(size=N_paths)
-            Z2 = np.random.normal(size=N_paths)
-            Z2 = rho * Z1 + np.sqrt(1 - rho**2) * Z2
+        control_vol, log_S_cv : fait évoluer sur place log_S_cv, spot
+        Black–Scholes de vol constante control_vol piloté par le même
+        brownien que le spot Heston (variable de contrôle).
+        """
+        if scheme not in _SCHEMES:
+            raise ValueError(f"Schéma inconnu : {scheme} (choix : {list(_SCHEMES)})")
+        scheme_step = _SCHEMES[scheme]
+        dt = T / N_steps
+        rho = self.params.rho
+        v = np.full(N_paths, float(self.params.v0))
 
-            # variance: CIR discretisation
-            v_prev = v[:, t - 1]
-            v_new = v_prev + kappa * (theta - v_prev) * dt + sigma * np.sqrt(np.maximum(v_prev, 0)) * np.sqrt(dt) * Z2
-            v_new = np.maximum(v_new, 1e-8)
-            v[:, t] = v_new
+        def step(t, log_S, Z):
+            nonlocal v
+            Z1, Z2 = Z
+            v_prev = v
+            log_S, v = scheme_step(log_S, v, Z1, Z2, dt, self.r, self.q, self.params)
+            if log_S_cv is not None:
+                # brownien du spot : Z1 en Euler, rho Z2 + sqrt(1-rho^2) Z1 en QE
+                W = Z1 if scheme == "euler" else rho * Z2 + np.sqrt(1 - rho**2) * Z1
+                log_S_cv[:] += (self.r - self.q - 0.5 * control_vol**2) * dt + control_vol * np.sqrt(dt) * W
+            return log_S, np.maximum(v_prev, 1e-12) * dt, v
 
-            # prix action
-            S[:, t] = S[:, t - 1] * np.exp((self.r - self.q - 0.5 * v_prev) * dt + np.sqrt(v_prev * dt) * Z1)
+        return step, 2, v
 
-        return S, v
+    def control_vol(self, T) -> float:
+        """
+        Vol BS de la variable de contrôle : racine de la variance moyenne
+        attendue sur [0, T], (1/T) int_0^T E[v_t] dt.
+        """
+        kappa, theta, v0 = self.params.kappa, self.params.theta, self.params.v0
+        v_bar = theta + (v0 - theta) * (1 - np.exp(-kappa * T)) / (kappa * T)
+        return float(np.sqrt(max(v_bar, 1e-12)))
 
     # ---------------------------
-    # Pricing Call MC
+    # Pricing MC
     # ---------------------------
-    def price_call_mc(self, K, T, N_steps=252, N_paths=20000):
-        S, _ = self.simulate_paths(T, N_steps, N_paths)
-        payoffs = np.maximum(S[:, -1] - K, 0)
+    def price_call_mc(self, K, T, N_steps=252, N_paths=20000, scheme="euler", seed=0, n_workers=1):
+        """
+        Prix MC d'un call ; n_workers > 1 répartit les trajectoires sur
+        plusieurs processus (voir price_european_mc_parallel).
+        """
+        if n_workers > 1:
+            return self.price_european_mc_parallel(
+                K, T, "call", N_steps, N_paths, seed, scheme, n_workers=n_workers
+            ).price
+        S_T, _ = self.simulate_terminal(T, N_steps, N_paths, seed=seed, scheme=scheme)
+        payoffs = np.maximum(S_T - K, 0)
         return np.exp(-self.r * T) * payoffs.mean()
+
+    def price_european_mc_parallel(self, K, T, option="call", N_steps=252, N_paths=20000, seed=0,
+                                   scheme="euler", n_workers=4, shard_size=10000, antithetic=False):
+        """
+        Call/put européen, trajectoires terminales réparties sur n_workers
+        processus, chacun avec son flux aléatoire enfant de seed.
+        option peut être "call", "put" ou "both" (dict des deux résultats).
+        """
+        blocks = partial(self.iter_path_blocks, T, N_steps, scheme=scheme, observation_steps=[N_steps],
+                         antithetic=antithetic)
+        payoffs = {
+            "call": partial(european_call_payoff, K=K),
+            "put": partial(european_put_payoff, K=K),
+        }
+        if option != "both":
+            payoffs = payoffs[option]
+        return parallel_monte_carlo_pricer(
+            blocks, payoffs, self.r, T, N_paths, n_workers=n_workers, seed=seed,
+            shard_size=shard_size, block_size=shard_size, antithetic=antithetic,
+        )
+
+    def price_european_mc(self, K, T, option="call", N_steps=252, N_paths=20000, seed=0, scheme="euler",
+                          antithetic=False, control_variate=False, moment_matching=False,
+                          sampler="pseudo", n_replications=8) -> MonteCarloResult:
+        """
+        Call/put européen par MC avec réduction de variance optionnelle :
+          - antithetic : paires (Z, -Z) ;
+          - control_variate : le même payoff sur un spot Black–Scholes
+            (vol control_vol(T)) simulé avec le même brownien, dont
+            l'espérance est connue en formule fermée (BlackScholesModel) ;
+          - moment_matching : normales recentrées/réduites à chaque pas.
+            Incompatible avec control_variate : le contrôle BS serait
+            piloté par des normales re-standardisées, dont la moyenne
+            d'échantillonnage ne vaut plus exactement le prix BS fermé
+            (correction de contrôle biaisée) ;
+          - sampler="sobol" : QMC randomisé (n_replications brouillages),
+            l'erreur standard est alors estimée entre réplications.
+        Le facteur de réduction de variance obtenu est dans
+        MonteCarloResult.variance_reduction ; avec moment_matching, il est
+        mesuré contre un MC simple de même graine et même taille (une
+        simulation de plus).
+        """
+        if control_variate and moment_matching:
+            raise ValueError("moment_matching et control_variate ne peuvent pas être combinés.")
+        sigma_cv = self.control_vol(T) if control_variate else None
+        log_S_cv = np.full(N_paths, np.log(self.S0)) if control_variate else None
+        step, n_factors, v0 = self._stepper(T, N_steps, N_paths, scheme, sigma_cv, log_S_cv)
+        S, _ = evolve_paths(
+            make_rng(seed), self.S0, N_steps, N_paths, step, n_factors, v0, [N_steps],
+            sampler=sampler, n_replications=n_replications, antithetic=antithetic, moment_matching=moment_matching,
+        )
+        S_cv_T = np.exp(log_S_cv) if control_variate else None
+
+        payoff_fn = european_call_payoff if option == "call" else european_put_payoff
+        control, control_mean = None, None
+        if control_variate:
+            control = payoff_fn(S_cv_T[:, None], K)
+            bs = BlackScholesModel(self.S0, self.r, sigma_cv, self.q)
+            bs_price_K = bs.call_price(K, T) if option == "call" else bs.put_price(K, T)
+            control_mean = bs_price_K * np.exp(self.r * T)   # espérance non actualisée
+
+        res = monte_carlo_pricer(
+            S, lambda S_: payoff_fn(S_, K), self.r, T,
+            antithetic=antithetic, control=control, control_mean=control_mean,
+            n_replications=n_replications if sampler == "sobol" else None,
+        )
+        if moment_matching:
+            # référence : MC simple de même graine et même nombre de trajectoires
+            S_plain, _ = self.simulate_terminal(T, N_steps, N_paths, seed=seed, scheme=scheme)
+            plain_var = payoff_fn(S_plain[:, None], K).var(ddof=1) / N_paths
+            res = replace(res, variance_reduction=float(plain_var / (res.stderr * np.exp(self.r * T)) ** 2))
+        return res
@@ -0,0 +1,376 @@
+import numpy as np
+from datetime import date
+from functools import lru_cache
+
+import pandas as pd
+from scipy.interpolate import CubicSpline
+
+from equity.heston import HestonParams
+
+
+# ---------------------------
+# Fonction caractéristique
+# ---------------------------
+
+def heston_log_cf(u, T: float, r: float, q: float, params: HestonParams):
+    """
+    Fonction caractéristique de ln(S_T / S0) sous Heston, vectorisée en u.
+
+    Formulation "little Heston trap" (Albrecher et al.) : on utilise
+    g = (beta - d) / (beta + d) et exp(-d T), ce qui évite les sauts de
+    branche du logarithme complexe pour les grandes maturités.
+
+    Les champs de params peuvent être des tableaux (broadcasting avec u),
+    ce qui permet d'évaluer plusieurs jeux de paramètres en une passe.
+    """
+    kappa, theta, sigma, rho, v0 = params.kappa, params.theta, params.sigma, params.rho, params.v0
+
+    u = np.asarray(u)
+    iu = 1j * u
+    beta = kappa - rho * sigma * iu
+    d = np.sqrt(beta**2 + sigma**2 * (iu + u**2))
+    g = (beta - d) / (beta + d)
+    exp_mdT = np.exp(-d * T)
+
+    C = iu * (r - q) * T + (kappa * theta / sigma**2) * (
+        (beta - d) * T - 2.0 * np.log((1.0 - g * exp_mdT) / (1.0 - g))
+    )
+    D = ((beta - d) / sigma**2) * (1.0 - exp_mdT) / (1.0 - g * exp_mdT)
+
+    return np.exp(C + D * v0)
+
+
+def heston_char_func(u, T: float, S0: float, r: float, q: float, params: HestonParams):
+    """
+    Fonction caractéristique de ln(S_T) (même convention que l'ancienne
+    version de interface/app.py), vectorisée en u.
+    """
+    u = np.asarray(u)
+    return np.exp(1j * u * np.log(S0)) * heston_log_cf(u, T, r, q, params)
+
+
+# ---------------------------
+# Pricing semi-analytique (Lewis + Gauss–Laguerre)
+# ---------------------------
+
+@lru_cache(maxsize=8)
+def _laguerre_grid(n_nodes: int):
+    """
+    Noeuds et poids de Gauss–Laguerre, poids multipliés par e^x pour
+    intégrer directement f sur [0, +inf).
+    """
+    x, w = np.polynomial.laguerre.laggauss(n_nodes)
+    return x, w * np.exp(x)
+
+
+def heston_call_prices(
+    S0: float,
+    K,
+    T: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    n_nodes: int = 128,
+) -> np.ndarray:
+    """
+    Prix de calls Heston pour un vecteur de strikes à une maturité donnée.
+
+    Formule de Lewis (une seule intégrale) :
+        C = S e^{-qT} - sqrt(S K) e^{-(r+q)T/2} / pi
+              * int_0^inf Re[ e^{i u k} phi(u - i/2) ] / (u^2 + 1/4) du
+    avec k = ln(F/K) et phi la fonction caractéristique de ln(S_T/F).
+
+    La fonction caractéristique n'est évaluée qu'une fois, sur la grille
+    de Gauss–Laguerre, puis réutilisée pour tous les strikes.
+    Si les champs de params sont des tableaux de forme (P, 1), le résultat
+    a la forme (P, len(K)).
+    """
+    K = np.atleast_1d(np.asarray(K, dtype=float))
+    if T <= 0:
+        return np.maximum(S0 * np.exp(-q * T) - K * np.exp(-r * T), 0.0)
+
+    x, w = _laguerre_grid(n_nodes)
+    u = x - 0.5j
+    phi = heston_log_cf(u, T, r, q, params) * np.exp(-1j * u * (r - q) * T)
+
+    F = S0 * np.exp((r - q) * T)
+    kx = np.multiply.outer(np.log(F / K), x)           # (nK, n)
+    weights = w / (x**2 + 0.25)
+    # Re[e^{ikx} phi] = cos(kx) Re(phi) - sin(kx) Im(phi)
+    integral = (np.cos(kx) * phi.real[..., None, :] - np.sin(kx) * phi.imag[..., None, :]) @ weights
+
+    return S0 * np.exp(-q * T) - np.sqrt(S0 * K) * np.exp(-0.5 * (r + q) * T) / np.pi * integral
+
+
+def heston_put_prices(
+    S0: float,
+    K,
+    T: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    n_nodes: int = 128,
+) -> np.ndarray:
+    """
+    Puts Heston par parité call/put : P = C - S e^{-qT} + K e^{-rT}.
+    """
+    K = np.atleast_1d(np.asarray(K, dtype=float))
+    calls = heston_call_prices(S0, K, T, r, q, params, n_nodes=n_nodes)
+    return calls - S0 * np.exp(-q * T) + K * np.exp(-r * T)
+
+
+def heston_call_price_cf(
+    S0: float,
+    K: float,
+    T: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    n_nodes: int = 128,
+) -> float:
+    """
+    Version scalaire (un strike) de heston_call_prices.
+    """
+    return float(heston_call_prices(S0, K, T, r, q, params, n_nodes=n_nodes)[0])
+
+
+def heston_greeks_cf(
+    S0: float,
+    K: float,
+    T: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    option: str = "call",
+    h_s: float = 1e-3,
+    h_v0: float = 1e-4,
+    n_nodes: int = 128,
+) -> dict:
+    """
+    Delta, gamma et vega (en v0) par différences centrées sur la formule
+    de Lewis, en un seul appel batché : trois v0 (params en (3, 1)) et,
+    par homogénéité C(S(1+h), K) = (1+h) C(S, K/(1+h)), trois strikes au
+    lieu de trois spots.
+    Renvoie un dict {delta, gamma, vega, theta, rho} (theta, rho : NaN).
+    """
+    v0s = params.v0 + np.array([[-h_v0], [0.0], [h_v0]])
+    batched = HestonParams(params.kappa, params.theta, params.sigma, params.rho, v0s)
+    scales = 1.0 + np.array([-h_s, 0.0, h_s])
+    calls = heston_call_prices(S0, K / scales, T, r, q, batched, n_nodes=n_nodes)   # (v0, spot)
+
+    prices = scales * calls                                 # prix au spot S0 (1 + h)
+    if option != "call":
+        prices = prices - scales * S0 * np.exp(-q * T) + K * np.exp(-r * T)
+    p_down, p0, p_up = prices[1]
+    return {
+        "delta": float((p_up - p_down) / (2.0 * S0 * h_s)),
+        "gamma": float((p_up - 2.0 * p0 + p_down) / (S0 * h_s) ** 2),
+        "vega": float((prices[2, 1] - prices[0, 1]) / (2.0 * h_v0)),
+        "theta": float("nan"),
+        "rho": float("nan"),
+    }
+
+
+# ---------------------------
+# Pricing FFT (Carr–Madan)
+# ---------------------------
+
+def _frft(x: np.ndarray, zeta: float) -> np.ndarray:
+    """
+    Transformée de Fourier fractionnaire (Bluestein / Chourdakis) :
+        y_u = sum_j x_j exp(-2 i pi zeta j u),  u = 0..N-1
+    calculée avec trois FFT de longueur 2N.
+    """
+    N = x.shape[-1]
+    j = np.arange(N)
+    chirp = np.exp(-1j * np.pi * zeta * j**2)
+    y = np.concatenate([x * chirp, np.zeros(N, dtype=complex)])
+    z = np.concatenate([np.conj(chirp), [0.0], np.conj(chirp[:0:-1])])
+    conv = np.fft.ifft(np.fft.fft(y) * np.fft.fft(z))
+    return chirp * conv[:N]
+
+
+def carr_madan_call_prices(
+    char_func,
+    S0: float,
+    T: float,
+    r: float,
+    q: float,
+    alpha: float = 1.5,
+    N: int = 4096,
+    eta: float = 0.25,
+    lam: float | None = None,
+):
+    """
+    Prix de calls sur une grille de log-strikes par FFT (Carr–Madan 1999).
+
+    char_func : u -> fonction caractéristique de ln(S_T) (vectorisée en u)
+    alpha : facteur d'amortissement (C(k) e^{alpha k} intégrable)
+    N, eta : nombre de points et pas de la grille en fréquence
+    lam : pas en log-strike. Par défaut lam = 2 pi / (N eta) (FFT classique) ;
+          sinon la grille est contrôlée librement via une FFT fractionnaire.
+
+    La grille de log-strikes est centrée sur ln(F). Renvoie (K, prix).
+    ValueError si char_func n'est pas fini, réel et positif en -(alpha+1)i
+    (moment d'ordre alpha + 1 infini).
+    """
+    if alpha <= 0:
+        raise ValueError("alpha doit être > 0.")
+    # C(k) e^{alpha k} n'est intégrable que si E[S_T^{alpha+1}] est fini :
+    # au-delà de l'explosion du moment, la formule fermée de la fonction
+    # caractéristique change de branche (valeur complexe, ou infinie)
+    moment = complex(np.ravel(char_func(np.array([-(alpha + 1.0) * 1j])))[0])
+    if not (np.isfinite(moment) and moment.real > 0 and abs(moment.imag) <= 1e-8 * moment.real):
+        raise ValueError(
+            f"Moment E[S_T^{alpha + 1:g}] infini à T={T:g} (fonction caractéristique en -(alpha+1)i : "
+            f"{moment:.3g}) : réduire alpha."
+        )
+    if lam is None:
+        lam = 2.0 * np.pi / (N * eta)
+
+    j = np.arange(N)
+    v = eta * j
+    k0 = np.log(S0) + (r - q) * T - 0.5 * N * lam
+
+    psi = np.exp(-r * T) * char_func(v - (alpha + 1.0) * 1j) / (
+        alpha**2 + alpha - v**2 + 1j * (2.0 * alpha + 1.0) * v
+    )
+    # Poids de Simpson
+    simpson = (3.0 + (-1.0) ** (j + 1)) / 3.0
+    simpson[0] = 1.0 / 3.0
+    x = np.exp(-1j * v * k0) * psi * eta * simpson
+
+    zeta = lam * eta / (2.0 * np.pi)
+    if np.isclose(zeta, 1.0 / N):
+        y = np.fft.fft(x)
+    else:
+        y = _frft(x, zeta)
+
+    k = k0 + lam * j
+    prices = np.exp(-alpha * k) / np.pi * y.real
+    return np.exp(k), prices
+
+
+def heston_moment_explosion_time(omega: float, params: HestonParams) -> float:
+    """
+    Temps d'explosion T*(omega) du moment E[S_T^omega] sous Heston,
+    omega > 1 (Andersen–Piterbarg 2007) : avec k = kappa - rho sigma omega
+    et D = k^2 - sigma^2 omega (omega - 1),
+      - D >= 0, k > 0 : moment fini à toute maturité (inf) ;
+      - D >= 0, k < 0 : T* = ln((k + sqrt D) / (k - sqrt D)) / sqrt D ;
+      - D < 0         : T* = 2 (pi 1{k < 0} + arctan(sqrt(-D) / k)) / sqrt(-D).
+    """
+    kappa, sigma, rho = params.kappa, params.sigma, params.rho
+    k = kappa - rho * sigma * omega
+    D = k**2 - sigma**2 * omega * (omega - 1.0)
+    if D >= 0:
+        if k > 0:
+            return np.inf
+        s = np.sqrt(D)
+        return float(np.log((k + s) / (k - s)) / s)
+    s = np.sqrt(-D)
+    return float(2.0 * (np.pi * (k < 0) + np.arctan(s / k)) / s)
+
+
+def heston_max_fft_alpha(T: float, params: HestonParams, alpha_max: float = 1.5) -> float:
+    """
+    Plus grand alpha <= alpha_max tel que E[S_T^{alpha+1}] soit fini à T
+    (T*(alpha + 1) > T ; T* décroît avec l'ordre du moment), par bisection.
+    """
+    if heston_moment_explosion_time(alpha_max + 1.0, params) > T:
+        return alpha_max
+    lo, hi = 0.0, alpha_max
+    for _ in range(50):
+        mid = 0.5 * (lo + hi)
+        if heston_moment_explosion_time(mid + 1.0, params) > T:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def heston_call_prices_fft(
+    S0: float,
+    T: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    alpha: float = 1.5,
+    N: int = 4096,
+    eta: float = 0.25,
+    lam: float | None = None,
+    min_alpha: float = 0.25,
+):
+    """
+    Smile Heston complet (grille dense de strikes) en une seule FFT.
+    Renvoie (K, prix des calls).
+
+    Si le moment d'ordre alpha + 1 explose avant T (grande maturité,
+    vol de vol élevée, rho > 0), alpha est ramené à 3/4 de sa valeur
+    critique (heston_max_fft_alpha) et eta réduit dans la même proportion
+    (le pôle de l'intégrande en v = 0 se rapproche quand alpha diminue).
+    ValueError si alpha tombe sous min_alpha : la FFT ne serait plus
+    précise, utiliser heston_call_prices (Lewis).
+    """
+    alpha_crit = heston_max_fft_alpha(T, params, alpha)
+    if alpha_crit < alpha:
+        alpha_eff = 0.75 * alpha_crit
+        if alpha_eff < min_alpha:
+            raise ValueError(
+                f"Moment E[S_T^(alpha+1)] infini dès alpha = {alpha_crit:.3f} à T={T:g} : FFT imprécise, "
+                "utiliser heston_call_prices (Lewis)."
+            )
+        eta *= alpha_eff / alpha
+        alpha = alpha_eff
+
+    def cf(u):
+        return heston_char_func(u, T, S0, r, q, params)
+
+    return carr_madan_call_prices(cf, S0, T, r, q, alpha=alpha, N=N, eta=eta, lam=lam)
+
+
+def heston_call_prices_fft_at(
+    S0: float,
+    K,
+    T: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    **fft_kwargs,
+) -> np.ndarray:
+    """
+    Prix FFT interpolés (spline cubique en log-strike) sur des strikes donnés.
+    """
+    K = np.atleast_1d(np.asarray(K, dtype=float))
+    K_grid, prices = heston_call_prices_fft(S0, T, r, q, params, **fft_kwargs)
+    k_grid = np.log(K_grid)
+    k = np.log(K)
+    if k.min() < k_grid[0] or k.max() > k_grid[-1]:
+        raise ValueError("Strikes hors de la grille FFT : augmenter N ou lam.")
+    return CubicSpline(k_grid, prices)(k)
+
+
+def heston_chain_prices_fft(
+    opt_mkt,
+    maturity: str,
+    S0: float,
+    r: float,
+    q: float,
+    params: HestonParams,
+    **fft_kwargs,
+) -> pd.DataFrame:
+    """
+    Prix Heston (calls et puts par parité) sur les strikes de marché d'une
+    maturité d'un OptionChainMarketData. Une seule FFT pour toute la chaîne.
+
+    Renvoie un DataFrame avec colonnes: strike, call_model, put_model.
+    """
+    calls, puts = opt_mkt.get_chain(maturity)
+    T = (date.fromisoformat(maturity) - opt_mkt.valuation_date).days / 365.0
+    if T <= 0:
+        raise ValueError(f"Maturité {maturity} déjà échue.")
+
+    strikes = np.union1d(calls["strike"].to_numpy(dtype=float), puts["strike"].to_numpy(dtype=float))
+    call_px = heston_call_prices_fft_at(S0, strikes, T, r, q, params, **fft_kwargs)
+    put_px = call_px - S0 * np.exp(-q * T) + strikes * np.exp(-r * T)
+    return pd.DataFrame({"strike": strikes, "call_model": call_px, "put_model": put_px})
@@ -0,0 +1,135 @@
+import numpy as np
+from dataclasses import dataclass, replace
+from scipy.stats import norm
+
+from equity.black_scholes import BlackScholesModel
+from equity.heston import HestonModel, log_spot_step_moments
+from equity.monte_carlo import MonteCarloResult, monte_carlo_pricer
+
+
+@dataclass
+class MCGreeks:
+    """
+    Prix et Greeks Monte Carlo, chacun avec son erreur standard.
+    vega : par unité de vol (BS) ou de variance initiale v0 (Heston).
+    """
+    price: MonteCarloResult
+    delta: MonteCarloResult
+    gamma: MonteCarloResult
+    vega: MonteCarloResult
+
+
+def _estimate(samples: np.ndarray, r: float, T: float, sampling: dict) -> MonteCarloResult:
+    """
+    Échantillons par trajectoire (non actualisés) -> moyenne actualisée + IC.
+    Avec antithetic, les paires (i, i + N/2) sont moyennées avant l'erreur
+    standard ; avec sampler="sobol", elle vient des réplications.
+    """
+    n_rep = sampling.get("n_replications", 8) if sampling.get("sampler") == "sobol" else None
+    return monte_carlo_pricer(samples, lambda x: x, r, T, antithetic=sampling.get("antithetic", False),
+                              n_replications=n_rep)
+
+
+def _payoff_and_slope(S_T: np.ndarray, K: float, option: str):
+    """
+    Payoff vanille et sa dérivée en S_T (indicatrice, signée pour le put).
+    """
+    if option == "call":
+        return np.maximum(S_T - K, 0.0), (S_T > K).astype(float)
+    return np.maximum(K - S_T, 0.0), -(S_T < K).astype(float)
+
+
+def _frozen_seed(seed):
+    # un Generator avance à chaque tirage : on le fige pour rejouer les mêmes normales
+    if isinstance(seed, np.random.Generator):
+        return np.random.SeedSequence(int(seed.integers(2**63)))
+    return seed
+
+
+# ---------------------------
+# Black–Scholes : pathwise + rapport de vraisemblance
+# ---------------------------
+
+def bs_mc_greeks(model: BlackScholesModel, K: float, T: float, option: str = "call",
+                 N_paths: int = 100000, seed=42, **sampling) -> MCGreeks:
+    """
+    Une seule simulation de S_T (schéma exact, un pas) :
+      - delta pathwise : g'(S_T) S_T / S0 ;
+      - vega pathwise : g'(S_T) S_T (sqrt(T) Z - sigma T) ;
+      - gamma mixte pathwise / LR : g'(S_T) S_T / S0^2 (Z / (sigma sqrt(T)) - 1),
+        la dérivée seconde de g n'existant pas au strike.
+    """
+    S_T = model.simulate_terminal(T, N_steps=1, N_paths=N_paths, seed=seed, **sampling)
+    sig_sqrtT = model.sigma * np.sqrt(T)
+    Z = (np.log(S_T / model.S0) - (model.r - model.q - 0.5 * model.sigma**2) * T) / sig_sqrtT
+    payoff, slope = _payoff_and_slope(S_T, K, option)
+
+    return MCGreeks(
+        price=_estimate(payoff, model.r, T, sampling),
+        delta=_estimate(slope * S_T / model.S0, model.r, T, sampling),
+        gamma=_estimate(slope * S_T / model.S0**2 * (Z / sig_sqrtT - 1.0), model.r, T, sampling),
+        vega=_estimate(slope * S_T * (np.sqrt(T) * Z - model.sigma * T), model.r, T, sampling),
+    )
+
+
+# ---------------------------
+# Heston : pathwise + nombres aléatoires communs
+# ---------------------------
+
+def heston_mc_greeks(model: HestonModel, K: float, T: float, option: str = "call", N_steps: int = 50,
+                     N_paths: int = 50000, seed=0, scheme: str = "qe", h_v0: float = 1e-3,
+                     **sampling) -> MCGreeks:
+    """
+    Greeks Heston en trois simulations de même aléa :
+      - delta pathwise : S_T est proportionnel à S0, d'où g'(S_T) S_T / S0 ;
+      - gamma pathwise conditionnel (digitale lissée) : sachant l'état
+        en début de fenêtre et les variances de la fenêtre, ln S_T est
+        gaussien (somme des moyennes mu et variances s^2 des pas, voir
+        log_spot_step_moments). L'espérance conditionnelle du delta
+        pathwise vaut alors M N(d1) / S0 pour un call (M = E[S_T | .],
+        d1 = (ln(M/K) + s^2/2) / s), fonction lisse de S0 (M est
+        proportionnel à S0) que l'on dérive :
+            gamma = E[M phi(d1) / (s S0^2)]   (call et put).
+        En QE, l'aléa du spot (Z1) est indépendant des variances : on
+        conditionne sur toute la trajectoire de variance (mémoire
+        O(N_paths * N_steps)). Sur le seul dernier pas, les trajectoires
+        à variance nulle (v = v' = 0, régime exponentiel) donnent s = 0,
+        un Dirac que l'échantillon ne voit pas : gamma biaisé vers le bas
+        (z ~ -4 à -13 à 20 pas). En Euler, v' dépend de Z1 : seul le
+        dernier pas, sachant v en début de pas, est conditionnable.
+        Sans biais par rapport au schéma (propriété de la tour), sans pas
+        de bump ;
+      - vega en v0 : différence centrée v0 ± h_v0 avec les mêmes normales
+        (nombres aléatoires communs), calculée trajectoire par trajectoire.
+    """
+    seed = _frozen_seed(seed)
+    if scheme not in ("euler", "qe"):
+        raise ValueError(f"Schéma inconnu : {scheme}")
+    dt = T / N_steps
+    kwargs = dict(N_steps=N_steps, N_paths=N_paths, seed=seed, scheme=scheme, **sampling)
+    start = 0 if scheme == "qe" else N_steps - 1
+    S, v = model.simulate_paths(T, observation_steps=list(range(start, N_steps + 1)), **kwargs)
+    S_T = S[:, -1]
+    payoff, slope = _payoff_and_slope(S_T, K, option)
+
+    mu, s2 = log_spot_step_moments(scheme, v[:, :-1], v[:, 1:], dt, model.r, model.q, model.params)
+    mu, s2 = mu.sum(axis=1), s2.sum(axis=1)
+    s = np.sqrt(np.maximum(s2, 1e-16))
+    M = S[:, 0] * np.exp(mu + 0.5 * s2)
+    d1 = (np.log(M / K) + 0.5 * s2) / s
+    gamma = M * norm.pdf(d1) / (s * model.S0**2)
+
+    h_v0 = min(h_v0, 0.5 * model.params.v0)
+    bumped = []
+    for v0 in (model.params.v0 + h_v0, model.params.v0 - h_v0):
+        m = HestonModel(model.S0, model.r, replace(model.params, v0=v0), model.q)
+        S_T_b, _ = m.simulate_terminal(T, **kwargs)
+        bumped.append(_payoff_and_slope(S_T_b, K, option)[0])
+    vega = (bumped[0] - bumped[1]) / (2.0 * h_v0)
+
+    return MCGreeks(
+        price=_estimate(payoff, model.r, T, sampling),
+        delta=_estimate(slope * S_T / model.S0, model.r, T, sampling),
+        gamma=_estimate(gamma, model.r, T, sampling),
+        vega=_estimate(vega, model.r, T, sampling),
+    )
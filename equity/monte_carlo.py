@@ -1,12 +1,26 @@
 import numpy as np
 from dataclasses import dataclass
-from typing import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable
+
+from equity.simulation import block_sizes, spawn_rngs
 
 @dataclass
 class MonteCarloResult:
     price: float
     stderr: float
     conf_int: tuple
+    n_paths: int | None = None
+    # Var(MC simple) / Var(estimateur), à nombre de trajectoires égal
+    variance_reduction: float | None = None
+    # QMC randomisé : nombre de réplications ayant servi à estimer stderr
+    n_replications: int | None = None
+
+
+def _pair_means(x: np.ndarray) -> np.ndarray:
+    # trajectoires i et i + n/2 antithétiques
+    half = len(x) // 2
+    return 0.5 * (x[:half] + x[half:2 * half])
 
 
 def monte_carlo_pricer(
@@ -14,19 +28,247 @@ def monte_carlo_pricer(
     payoff_fn: Callable[[np.ndarray], np.ndarray],
     r: float,
     T: float,
+    antithetic: bool = False,
+    control: np.ndarray | None = None,
+    control_mean: float | None = None,
+    n_replications: int | None = None,
 ):
     """
     S_paths: matrice (N_paths × N_steps+1)
     payoff_fn: prend un vecteur de prix finaux, ou la trajectoire complète
+    antithetic: S_paths simulé avec antithetic=True (paires i, i + N/2)
+    control, control_mean: valeurs par trajectoire d'une variable de
+        contrôle et son espérance exacte (non actualisée) ; coefficient
+        optimal beta = Cov(Y, C) / Var(C) estimé sur l'échantillon.
+    n_replications: S_paths simulé avec sampler="sobol" ; l'erreur standard
+        est l'écart-type des moyennes des réplications (QMC randomisé),
+        / sqrt(n_replications).
     """
     payoffs = payoff_fn(S_paths)
     disc = np.exp(-r * T)
-    price = disc * payoffs.mean()
+    n_paths = len(payoffs)
+
+    samples = payoffs
+    if antithetic:
+        samples = _pair_means(payoffs)
+        if control is not None:
+            control = _pair_means(control)
+    if control is not None:
+        c = control - control_mean
+        beta = np.cov(samples, c)[0, 1] / c.var(ddof=1)
+        samples = samples - beta * c
 
-    stderr = disc * payoffs.std(ddof=1) / np.sqrt(len(payoffs))
+    if n_replications:
+        rep_means = np.array([chunk.mean() for chunk in np.array_split(samples, n_replications)])
+        price = disc * rep_means.mean()
+        stderr = disc * rep_means.std(ddof=1) / np.sqrt(n_replications)
+        est_var = (stderr / disc) ** 2
+    else:
+        price = disc * samples.mean()
+        stderr = disc * samples.std(ddof=1) / np.sqrt(len(samples))
+        est_var = samples.var(ddof=1) / len(samples)
     ci = (price - 1.96 * stderr, price + 1.96 * stderr)
 
-    return MonteCarloResult(price=price, stderr=stderr, conf_int=ci)
+    vr = None
+    if antithetic or control is not None or n_replications:
+        vr = float((payoffs.var(ddof=1) / n_paths) / est_var)
+
+    return MonteCarloResult(price=price, stderr=stderr, conf_int=ci, n_paths=n_paths, variance_reduction=vr,
+                            n_replications=n_replications)
+
+
+# ---------------------------
+# Estimateur en flux (par blocs)
+# ---------------------------
+
+class RunningStats:
+    """
+    Moyenne / variance courantes (Welford), mises à jour par lots avec la
+    formule de fusion de Chan : aucun échantillon n'est conservé.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.M2 = 0.0
+
+    def update(self, x: np.ndarray) -> None:
+        x = np.asarray(x, dtype=float).ravel()
+        n_b = x.size
+        if n_b == 0:
+            return
+        mean_b = x.mean()
+        self._combine(n_b, mean_b, ((x - mean_b) ** 2).sum())
+
+    def merge(self, other: "RunningStats") -> None:
+        """
+        Fusionne les statistiques d'un autre échantillon (ex: un worker).
+        """
+        if other.n:
+            self._combine(other.n, other.mean, other.M2)
+
+    def _combine(self, n_b: int, mean_b: float, M2_b: float) -> None:
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.M2 += M2_b + delta**2 * self.n * n_b / n
+        self.n = n
+
+    @property
+    def variance(self) -> float:
+        return self.M2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    @property
+    def stderr(self) -> float:
+        return np.sqrt(self.variance / self.n) if self.n > 1 else float("inf")
+
+
+def result_from_stats(stats: RunningStats, disc: float, paths_per_sample: int = 1) -> MonteCarloResult:
+    """
+    MonteCarloResult actualisé (facteur disc) à partir de statistiques
+    courantes ; paths_per_sample = 2 pour des moyennes de paires antithétiques.
+    """
+    price = disc * stats.mean
+    stderr = disc * stats.stderr
+    return MonteCarloResult(
+        price=price,
+        stderr=stderr,
+        conf_int=(price - 1.96 * stderr, price + 1.96 * stderr),
+        n_paths=stats.n * paths_per_sample,
+    )
+
+
+def streaming_monte_carlo_pricer(
+    path_blocks: Iterable[np.ndarray],
+    payoff_fns: Callable[[np.ndarray], np.ndarray] | Dict[str, Callable[[np.ndarray], np.ndarray]],
+    r: float,
+    T: float,
+    target_stderr: float | None = None,
+    target_ci_width: float | None = None,
+    max_paths: int | None = None,
+    min_paths: int = 1000,
+    antithetic: bool = False,
+):
+    """
+    Pricer MC qui consomme des blocs de trajectoires (ex: model.iter_path_blocks)
+    et met à jour moyenne/variance de chaque payoff au fil de l'eau.
+
+    Arrêt dès que, pour tous les payoffs, l'erreur standard actualisée est
+    <= target_stderr et/ou la largeur de l'IC à 95% est <= target_ci_width
+    (après au moins min_paths trajectoires), ou quand max_paths / la fin du
+    générateur est atteint. Les blocs suivants ne sont alors pas simulés.
+
+    payoff_fns : un payoff, ou un dict {nom: payoff} (résultat du même type).
+    antithetic : blocs simulés avec antithetic=True ; chaque paire de
+        trajectoires compte comme un seul échantillon.
+    """
+    single = callable(payoff_fns)
+    fns = {"payoff": payoff_fns} if single else dict(payoff_fns)
+    stats = {name: RunningStats() for name in fns}
+    disc = np.exp(-r * T)
+    per_sample = 2 if antithetic else 1
+
+    def reached() -> bool:
+        if target_stderr is None and target_ci_width is None:
+            return False
+        n = next(iter(stats.values())).n * per_sample
+        if n < min_paths:
+            return False
+        for st in stats.values():
+            se = disc * st.stderr
+            if target_stderr is not None and se > target_stderr:
+                return False
+            if target_ci_width is not None and 2 * 1.96 * se > target_ci_width:
+                return False
+        return True
+
+    for S_block in path_blocks:
+        for name, fn in fns.items():
+            payoffs = fn(S_block)
+            stats[name].update(_pair_means(payoffs) if antithetic else payoffs)
+        n = next(iter(stats.values())).n * per_sample
+        if reached() or (max_paths is not None and n >= max_paths):
+            break
+
+    if hasattr(path_blocks, "close"):
+        path_blocks.close()
+
+    results = {name: result_from_stats(st, disc, per_sample) for name, st in stats.items()}
+    return results["payoff"] if single else results
+
+
+# ---------------------------
+# MC parallèle (processus)
+# ---------------------------
+
+def _mc_shard(args):
+    """
+    Un fragment de trajectoires, simulé et réduit dans un worker : seules
+    les statistiques (n, moyenne, M2) par payoff repartent vers le parent.
+    """
+    path_blocks, fns, n_paths, rng, block_size, antithetic = args
+    stats = {name: RunningStats() for name in fns}
+    for S_block in path_blocks(N_paths=n_paths, block_size=block_size, seed=rng):
+        for name, fn in fns.items():
+            payoffs = fn(S_block)
+            stats[name].update(_pair_means(payoffs) if antithetic else payoffs)
+    return stats
+
+
+def parallel_monte_carlo_pricer(
+    path_blocks: Callable[..., Iterable[np.ndarray]],
+    payoff_fns: Callable[[np.ndarray], np.ndarray] | Dict[str, Callable[[np.ndarray], np.ndarray]],
+    r: float,
+    T: float,
+    N_paths: int,
+    n_workers: int = 1,
+    seed=None,
+    shard_size: int = 10000,
+    block_size: int = 10000,
+    antithetic: bool = False,
+):
+    """
+    Pricer MC réparti sur un ProcessPoolExecutor.
+
+    path_blocks : générateur de blocs appelé comme
+        path_blocks(N_paths=..., block_size=..., seed=rng), typiquement
+        functools.partial(model.iter_path_blocks, T, N_steps, observation_steps=[N_steps]).
+    payoff_fns : un payoff ou un dict {nom: payoff} ; tout doit être
+        picklable (fonctions de module, functools.partial — pas de lambda).
+
+    Les N_paths trajectoires sont découpées en fragments de shard_size,
+    chacun avec son flux enfant (spawn_rngs(seed, ...)) : le résultat ne
+    dépend pas de n_workers. Les moyennes / variances partielles sont
+    fusionnées (Chan) en un MonteCarloResult par payoff. Avec antithetic,
+    shard_size et block_size sont arrondis au pair supérieur pour que
+    chaque fragment contienne des paires complètes.
+    """
+    if antithetic:
+        if N_paths % 2:
+            raise ValueError("N_paths doit être pair avec des variables antithétiques.")
+        shard_size += shard_size % 2
+        block_size += block_size % 2
+    single = callable(payoff_fns)
+    fns = {"payoff": payoff_fns} if single else dict(payoff_fns)
+    sizes = block_sizes(N_paths, shard_size)
+    rngs = spawn_rngs(seed, len(sizes))
+    tasks = [(path_blocks, fns, n, rng, block_size, antithetic) for n, rng in zip(sizes, rngs)]
+
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            partials = list(pool.map(_mc_shard, tasks))
+    else:
+        partials = [_mc_shard(task) for task in tasks]
+
+    stats = {name: RunningStats() for name in fns}
+    for part in partials:
+        for name in fns:
+            stats[name].merge(part[name])
+
+    disc = np.exp(-r * T)
+    per_sample = 2 if antithetic else 1
+    results = {name: result_from_stats(st, disc, per_sample) for name, st in stats.items()}
+    return results["payoff"] if single else results
 
 
 def european_call_payoff(S_paths: np.ndarray, K: float):
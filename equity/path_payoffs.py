@@ -0,0 +1,215 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from equity.monte_carlo import MonteCarloResult, RunningStats, result_from_stats
+from equity.simulation import block_sizes, make_rng
+
+
+# ---------------------------
+# Observateurs de trajectoire
+# ---------------------------
+
+class PathObserver(ABC):
+    """
+    Payoff dépendant de la trajectoire, calculé au fil de la simulation :
+    le simulateur appelle reset() puis update() à chaque pas, et l'on ne
+    garde que des statistiques courantes de taille N_paths (moyenne,
+    extremum, indicatrice de barrière...), jamais la matrice complète.
+
+    update(S_prev, S_new, var_dt) : spots avant / après le pas et variance
+    du log-spot sur le pas (sigma^2 dt en BS, v_t dt en Heston), utilisée
+    par la correction de pont brownien des barrières.
+    """
+
+    def reset(self, n_paths: int, S0) -> None:
+        self.S_T = np.full(n_paths, S0, dtype=float)
+
+    def update(self, S_prev: np.ndarray, S_new: np.ndarray, var_dt) -> None:
+        self.S_T = S_new
+
+    @abstractmethod
+    def payoff(self) -> np.ndarray:
+        """Payoff (non actualisé) par trajectoire, après le dernier update()."""
+        ...
+
+
+def _vanilla(S: np.ndarray, K: float, option: str) -> np.ndarray:
+    return np.maximum(S - K, 0.0) if option == "call" else np.maximum(K - S, 0.0)
+
+
+class AsianObserver(PathObserver):
+    """
+    Asiatique à strike fixe sur la moyenne des dates de pas 1..N
+    (S0 exclu), arithmétique ou géométrique.
+    """
+
+    def __init__(self, K: float, option: str = "call", kind: str = "arithmetic"):
+        if kind not in ("arithmetic", "geometric"):
+            raise ValueError(f"Moyenne inconnue : {kind}")
+        self.K, self.option, self.kind = K, option, kind
+
+    def reset(self, n_paths, S0):
+        super().reset(n_paths, S0)
+        self.total = np.zeros(n_paths)
+        self.count = 0
+
+    def update(self, S_prev, S_new, var_dt):
+        super().update(S_prev, S_new, var_dt)
+        self.total += np.log(S_new) if self.kind == "geometric" else S_new
+        self.count += 1
+
+    def payoff(self):
+        mean = self.total / self.count
+        avg = np.exp(mean) if self.kind == "geometric" else mean
+        return _vanilla(avg, self.K, self.option)
+
+
+class BarrierObserver(PathObserver):
+    """
+    Barrière knock-in / knock-out (barrier_type parmi "up-and-out",
+    "down-and-out", "up-and-in", "down-and-in") sur un call/put vanille.
+
+    bridge_correction : entre deux dates de simulation, la probabilité que
+    le pont brownien (en log) touche H vaut
+        p = exp(-2 ln(H/S_prev) ln(H/S_new) / var_dt),
+    et l'on multiplie une probabilité de survie par (1 - p) au lieu de
+    tirer l'événement : barrière continue sans biais de discrétisation
+    et sans variance supplémentaire.
+    """
+
+    def __init__(self, K: float, barrier: float, barrier_type: str = "up-and-out",
+                 option: str = "call", rebate: float = 0.0, bridge_correction: bool = True):
+        direction, _, knock = barrier_type.partition("-and-")
+        if direction not in ("up", "down") or knock not in ("in", "out"):
+            raise ValueError(f"Type de barrière inconnu : {barrier_type}")
+        self.K, self.H, self.option, self.rebate = K, barrier, option, rebate
+        self.up, self.knock_out = direction == "up", knock == "out"
+        self.bridge_correction = bridge_correction
+
+    def reset(self, n_paths, S0):
+        super().reset(n_paths, S0)
+        breached = np.asarray(S0 >= self.H if self.up else S0 <= self.H)
+        self.survival = np.where(breached, 0.0, np.ones(n_paths))
+
+    def update(self, S_prev, S_new, var_dt):
+        super().update(S_prev, S_new, var_dt)
+        crossed = S_new >= self.H if self.up else S_new <= self.H
+        self.survival[crossed] = 0.0
+        if self.bridge_correction:
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                p = np.exp(-2.0 * np.log(self.H / S_prev) * np.log(self.H / S_new) / var_dt)
+            self.survival *= np.where(crossed | ~np.isfinite(p), 1.0, 1.0 - np.minimum(p, 1.0))
+
+    def payoff(self):
+        alive = self.survival if self.knock_out else 1.0 - self.survival
+        return alive * _vanilla(self.S_T, self.K, self.option) + (1.0 - alive) * self.rebate
+
+
+class LookbackObserver(PathObserver):
+    """
+    Lookback sur les dates de simulation (S0 compris) :
+      - strike=None (flottant) : call S_T - min, put max - S_T ;
+      - strike K (fixe) : call (max - K)^+, put (K - min)^+.
+    """
+
+    def __init__(self, option: str = "call", strike: float | None = None):
+        self.option, self.K = option, strike
+
+    def reset(self, n_paths, S0):
+        super().reset(n_paths, S0)
+        self.S_max = np.full(n_paths, S0, dtype=float)
+        self.S_min = np.full(n_paths, S0, dtype=float)
+
+    def update(self, S_prev, S_new, var_dt):
+        super().update(S_prev, S_new, var_dt)
+        np.maximum(self.S_max, S_new, out=self.S_max)
+        np.minimum(self.S_min, S_new, out=self.S_min)
+
+    def payoff(self):
+        if self.K is None:
+            return self.S_T - self.S_min if self.option == "call" else self.S_max - self.S_T
+        return _vanilla(self.S_max if self.option == "call" else self.S_min, self.K, self.option)
+
+
+class DigitalObserver(PathObserver):
+    """
+    Digitale cash-or-nothing : cash * 1{S_T > K} (call) ou 1{S_T < K} (put).
+    """
+
+    def __init__(self, K: float, option: str = "call", cash: float = 1.0):
+        self.K, self.option, self.cash = K, option, cash
+
+    def payoff(self):
+        hit = self.S_T > self.K if self.option == "call" else self.S_T < self.K
+        return self.cash * hit
+
+
+# ---------------------------
+# Formes "matrice de trajectoires"
+# ---------------------------
+
+def run_observer(observer: PathObserver, S_paths: np.ndarray, var_dt=None) -> np.ndarray:
+    """
+    Applique un observateur à une matrice (N_paths × nb de dates) déjà
+    simulée, colonne par colonne. var_dt : sigma^2 dt (scalaire) ou
+    matrice (N_paths × nb de pas) de v_t dt, pour les barrières.
+    """
+    observer.reset(S_paths.shape[0], S_paths[:, 0])
+    for j in range(1, S_paths.shape[1]):
+        vdt = var_dt[:, j - 1] if np.ndim(var_dt) == 2 else var_dt
+        observer.update(S_paths[:, j - 1], S_paths[:, j], vdt)
+    return observer.payoff()
+
+
+def asian_payoff(S_paths, K, option="call", kind="arithmetic"):
+    return run_observer(AsianObserver(K, option, kind), S_paths)
+
+
+def barrier_payoff(S_paths, K, barrier, barrier_type="up-and-out", option="call", rebate=0.0, var_dt=None):
+    """
+    Sans var_dt, la barrière n'est surveillée qu'aux dates de la matrice.
+    """
+    observer = BarrierObserver(K, barrier, barrier_type, option, rebate, bridge_correction=var_dt is not None)
+    return run_observer(observer, S_paths, var_dt)
+
+
+def lookback_payoff(S_paths, option="call", strike=None):
+    return run_observer(LookbackObserver(option, strike), S_paths)
+
+
+def digital_payoff(S_paths, K, option="call", cash=1.0):
+    hit = S_paths[:, -1] > K if option == "call" else S_paths[:, -1] < K
+    return cash * hit
+
+
+# ---------------------------
+# Pricing sans stockage des trajectoires
+# ---------------------------
+
+def price_path_dependent(
+    model,
+    observers: Dict[str, PathObserver],
+    T: float,
+    N_steps: int = 252,
+    N_paths: int = 20000,
+    block_size: int = 10000,
+    seed=0,
+    **sim_kwargs,
+) -> Dict[str, MonteCarloResult]:
+    """
+    Prix MC de plusieurs payoffs dépendant du chemin en une seule
+    simulation, par blocs : model.simulate_observed fait avancer les
+    observateurs pas à pas, la mémoire reste O(block_size).
+
+    model : BlackScholesModel ou HestonModel ; sim_kwargs est transmis au
+    simulateur (scheme=..., sampler=..., ...).
+    """
+    rng = make_rng(seed)
+    stats = {name: RunningStats() for name in observers}
+    for n in block_sizes(N_paths, block_size):
+        model.simulate_observed(T, N_steps, n, list(observers.values()), seed=rng, **sim_kwargs)
+        for name, obs in observers.items():
+            stats[name].update(obs.payoff())
+    disc = np.exp(-model.r * T)
+    return {name: result_from_stats(st, disc) for name, st in stats.items()}
@@ -0,0 +1,300 @@
+import warnings
+from collections import deque
+from functools import lru_cache
+from typing import Sequence, Union
+
+import numpy as np
+from scipy.stats import norm, qmc
+
+
+# ---------------------------
+# Dates d'observation
+# ---------------------------
+
+def observation_index(observation_steps: Sequence[int] | None, N_steps: int) -> np.ndarray:
+    """
+    Indices de pas (0..N_steps) à conserver pendant une simulation.
+    None -> toute la trajectoire ; [N_steps] -> valeurs terminales seulement.
+    """
+    if observation_steps is None:
+        return np.arange(N_steps + 1)
+    idx = np.unique(np.asarray(observation_steps, dtype=int))
+    if idx.size == 0 or idx[0] < 0 or idx[-1] > N_steps:
+        raise ValueError(f"observation_steps doit être dans [0, {N_steps}] et non vide.")
+    return idx
+
+
+def block_sizes(N_paths: int, block_size: int):
+    """
+    Découpe N_paths trajectoires en blocs d'au plus block_size.
+    """
+    if block_size <= 0:
+        raise ValueError("block_size doit être > 0")
+    full, rest = divmod(N_paths, block_size)
+    return [block_size] * full + ([rest] if rest else [])
+
+
+# ---------------------------
+# Générateurs aléatoires
+# ---------------------------
+
+# Graine acceptée par les simulateurs : entier, SeedSequence, Generator ou None
+Seed = Union[int, np.random.SeedSequence, np.random.Generator, None]
+
+
+def make_rng(seed: Seed = None) -> np.random.Generator:
+    """
+    Generator local (aucun état global modifié). Un Generator passé tel
+    quel est réutilisé ; un entier ou une SeedSequence donnent toujours
+    les mêmes tirages.
+    """
+    return np.random.default_rng(seed)
+
+
+def spawn_rngs(seed: Seed, n: int) -> list:
+    """
+    n flux enfants indépendants et reproductibles (SeedSequence.spawn),
+    sans recouvrement : un par thread / processus / bloc de trajectoires.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed.spawn(n)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.default_rng(child) for child in root.spawn(n)]
+
+
+# ---------------------------
+# Tirages normaux (réduction de variance)
+# ---------------------------
+
+def draw_normals(rng: np.random.Generator, n_paths: int, antithetic: bool = False,
+                 moment_matching: bool = False) -> np.ndarray:
+    """
+    Un vecteur de N(0,1) pour un pas de temps.
+      - antithetic : la seconde moitié vaut l'opposé de la première
+        (la trajectoire i et i + n_paths/2 forment une paire) ;
+      - moment_matching : recentrage / réduction exacts de l'échantillon
+        (moyenne 0, écart-type 1).
+    """
+    if antithetic:
+        if n_paths % 2:
+            raise ValueError("N_paths doit être pair avec des variables antithétiques.")
+        half = rng.standard_normal(n_paths // 2)
+        Z = np.concatenate([half, -half])
+    else:
+        Z = rng.standard_normal(n_paths)
+    if moment_matching and n_paths > 1:
+        Z = (Z - Z.mean()) / Z.std()
+    return Z
+
+
+# ---------------------------
+# Quasi-Monte Carlo (Sobol brouillé + pont brownien)
+# ---------------------------
+
+@lru_cache(maxsize=32)
+def _bridge_schedule(N_steps: int):
+    """
+    Ordre de construction du pont brownien sur la grille 0..N_steps :
+    d'abord W_N, puis les milieux par dichotomie (du plus grossier au plus
+    fin). Chaque entrée est (indice, gauche, droite).
+    """
+    schedule = [(N_steps, 0, N_steps)]
+    queue = deque([(0, N_steps)])
+    while queue:
+        left, right = queue.popleft()
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        schedule.append((mid, left, right))
+        queue.append((left, mid))
+        queue.append((mid, right))
+    return tuple(schedule)
+
+
+def brownian_bridge_increments(z: np.ndarray) -> np.ndarray:
+    """
+    z : normales (n_paths, N_steps) dans l'ordre de construction du pont.
+    Renvoie les accroissements W_t - W_{t-1} (en unités de pas, donc
+    N(0,1)) : les premières coordonnées, les mieux réparties d'une suite
+    de Sobol, portent la forme globale de la trajectoire.
+    """
+    n_paths, N_steps = z.shape
+    W = np.zeros((n_paths, N_steps + 1))
+    for k, (i, left, right) in enumerate(_bridge_schedule(N_steps)):
+        if k == 0:
+            W[:, i] = np.sqrt(i) * z[:, 0]
+            continue
+        w_left, w_right = (right - i) / (right - left), (i - left) / (right - left)
+        sd = np.sqrt((i - left) * (right - i) / (right - left))
+        W[:, i] = w_left * W[:, left] + w_right * W[:, right] + sd * z[:, k]
+    return np.diff(W, axis=1)
+
+
+def sobol_normals(rng: np.random.Generator, n_paths: int, N_steps: int, n_factors: int = 1,
+                  n_replications: int = 8) -> np.ndarray:
+    """
+    Normales QMC de forme (N_steps, n_factors, n_paths).
+
+    n_replications brouillages de Sobol indépendants (QMC randomisé) :
+    les trajectoires sont rangées par réplication, en blocs contigus de
+    tailles np.array_split(n_paths, n_replications), ce qui permet à
+    monte_carlo_pricer d'estimer l'erreur à partir des moyennes par
+    réplication. Les coordonnées sont entrelacées par facteur (le pont
+    de chaque facteur commence par les premières dimensions de Sobol).
+    Des tailles de réplication en puissance de 2 donnent le meilleur
+    équilibre de la suite. Les brouillages sont tirés de rng.
+    """
+    dim = N_steps * n_factors
+    out = np.empty((N_steps, n_factors, n_paths))
+    start = 0
+    for m in (len(chunk) for chunk in np.array_split(np.arange(n_paths), n_replications)):
+        if m == 0:
+            continue
+        sobol = qmc.Sobol(d=dim, scramble=True, seed=rng)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)   # m non puissance de 2
+            u = sobol.random(m)
+        z = norm.ppf(np.clip(u, 1e-12, 1 - 1e-12)).reshape(m, N_steps, n_factors)
+        for f in range(n_factors):
+            out[:, f, start:start + m] = brownian_bridge_increments(z[:, :, f]).T
+        start += m
+    return out
+
+
+SAMPLERS = ("pseudo", "sobol")
+
+
+def normal_source(
+    rng: np.random.Generator,
+    n_paths: int,
+    N_steps: int,
+    n_factors: int = 1,
+    sampler: str = "pseudo",
+    antithetic: bool = False,
+    moment_matching: bool = False,
+    n_replications: int = 8,
+):
+    """
+    Fonction t -> normales du pas t (t = 1..N_steps), de forme (n_factors, n_paths).
+      - "pseudo" : tirages de rng pas à pas (mémoire O(n_paths)) ;
+      - "sobol"  : QMC, tout est tiré d'avance (mémoire O(n_paths * N_steps)).
+    """
+    if sampler == "pseudo":
+        return lambda t: [draw_normals(rng, n_paths, antithetic, moment_matching) for _ in range(n_factors)]
+    if sampler == "sobol":
+        if antithetic or moment_matching:
+            raise ValueError("antithetic / moment_matching ne s'appliquent pas au sampler 'sobol'.")
+        Z = sobol_normals(rng, n_paths, N_steps, n_factors, n_replications)
+        return lambda t: Z[t - 1]
+    raise ValueError(f"Sampler inconnu : {sampler} (choix : {list(SAMPLERS)})")
+
+
+# ---------------------------
+# Moteur de simulation commun
+# ---------------------------
+
+def evolve_paths(rng: np.random.Generator, S0: float, N_steps: int, N_paths: int, step, n_factors: int = 1,
+                 state0=None, observation_steps: Sequence[int] | None = None, observers=(), **sampling):
+    """
+    Boucle de simulation partagée par les modèles : fait avancer ln S sur
+    place pas à pas et ne stocke que les colonnes demandées (mémoire
+    O(N_paths * nb d'observations)).
+
+    step(t, log_S, Z) -> (log_S, var_dt, state) : un pas du modèle, Z les
+    normales du pas t (n_factors, N_paths). var_dt est la variance du
+    log-spot sur le pas, transmise aux observateurs (PathObserver,
+    equity.path_payoffs, appelés à chaque pas) ; state est le vecteur
+    d'état observé avec le spot (variance Heston), None sans état.
+    state0 : état initial (None sans état).
+    sampling : options de tirage des normales (normal_source).
+    Renvoie (S_obs, state_obs), state_obs valant None sans état.
+    """
+    obs = observation_index(observation_steps, N_steps)
+    S_obs = np.empty((N_paths, obs.size))
+    state_obs = np.empty((N_paths, obs.size)) if state0 is not None else None
+    log_S = np.full(N_paths, np.log(S0))
+    normals = normal_source(rng, N_paths, N_steps, n_factors=n_factors, **sampling)
+    for o in observers:
+        o.reset(N_paths, S0)
+    S_cur = np.full(N_paths, float(S0))
+
+    col = 0
+    if obs[0] == 0:
+        S_obs[:, 0] = S0
+        if state_obs is not None:
+            state_obs[:, 0] = state0
+        col = 1
+    for t in range(1, N_steps + 1):
+        log_S, var_dt, state = step(t, log_S, normals(t))
+        if observers:
+            S_prev, S_cur = S_cur, np.exp(log_S)
+            for o in observers:
+                o.update(S_prev, S_cur, var_dt)
+        if col < obs.size and obs[col] == t:
+            S_obs[:, col] = np.exp(log_S)
+            if state_obs is not None:
+                state_obs[:, col] = state
+            col += 1
+
+    return S_obs, state_obs
+
+
+class PathSimulator:
+    """
+    Interface de simulation commune (BlackScholesModel, HestonModel,
+    LocalVolModel) au-dessus d'evolve_paths : trajectoires complètes ou aux
+    dates d'observation, valeurs terminales, observateurs de chemin, blocs.
+
+    Une sous-classe fournit S0 et
+        _stepper(T, N_steps, N_paths, **model_kwargs) -> (step, n_factors, state0)
+    (voir evolve_paths) ; _model_kwargs nomme les options du modèle
+    (ex. scheme en Heston), les autres étant des options de tirage
+    (sampler, n_replications, antithetic, moment_matching ; voir
+    normal_source). Avec un état (state0 non None), les simulations
+    renvoient (S, état) au lieu de S.
+    seed : entier, SeedSequence ou Generator (make_rng) ; l'état global
+    de np.random n'est jamais modifié.
+    """
+    _model_kwargs: tuple = ()
+
+    def _evolve(self, rng, T, N_steps, N_paths, observation_steps=None, observers=(), **kwargs):
+        model_kwargs = {name: kwargs.pop(name) for name in self._model_kwargs if name in kwargs}
+        step, n_factors, state0 = self._stepper(T, N_steps, N_paths, **model_kwargs)
+        return evolve_paths(rng, self.S0, N_steps, N_paths, step, n_factors, state0, observation_steps,
+                            observers, **kwargs)
+
+    @staticmethod
+    def _output(S, state):
+        return S if state is None else (S, state)
+
+    def simulate_paths(self, T, N_steps=252, N_paths=10000, seed=0, observation_steps=None, **kwargs):
+        """
+        Matrice (N_paths × nb d'observations) ; observation_steps=None donne
+        la trajectoire complète, [N_steps] la valeur terminale seulement.
+        """
+        return self._output(*self._evolve(make_rng(seed), T, N_steps, N_paths, observation_steps, **kwargs))
+
+    def simulate_terminal(self, T, N_steps=252, N_paths=10000, seed=0, **kwargs):
+        """Valeurs terminales seulement, en vecteurs de taille N_paths."""
+        S, state = self._evolve(make_rng(seed), T, N_steps, N_paths, [N_steps], **kwargs)
+        return self._output(S[:, 0], None if state is None else state[:, 0])
+
+    def simulate_observed(self, T, N_steps=252, N_paths=10000, observers=(), seed=0, **kwargs):
+        """
+        Simulation sans stockage : seuls les observateurs (payoffs dépendant
+        du chemin, equity.path_payoffs) sont mis à jour. Renvoie les valeurs
+        terminales, comme simulate_terminal.
+        """
+        S, state = self._evolve(make_rng(seed), T, N_steps, N_paths, [N_steps], observers, **kwargs)
+        return self._output(S[:, 0], None if state is None else state[:, 0])
+
+    def iter_path_blocks(self, T, N_steps=252, N_paths=10000, block_size=10000, seed=0, observation_steps=None,
+                         **kwargs):
+        """
+        Générateur de blocs de trajectoires de spot (block_size × nb
+        d'observations), pour traiter des millions de trajectoires à mémoire
+        bornée. Les blocs consomment successivement le même flux aléatoire.
+        """
+        rng = make_rng(seed)
+        for n in block_sizes(N_paths, block_size):
+            yield self._evolve(rng, T, N_steps, n, observation_steps, **kwargs)[0]
@@ -4,105 +4,9 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import numpy as np
 import streamlit as st
 import matplotlib.pyplot as plt
-from dataclasses import dataclass
 from math import erf
-from equity import heston_analytic
-
-@dataclass
-class HestonParams:
-    kappa: float
-    theta: float
-    sigma: float
-    rho: float
-    v0: float
-
-def heston_char_func(
-    u: complex,
-    T: float,
-    S0: float,
-    r: float,
-    q: float,
-    params: HestonParams,
-) -> complex:
-    kappa = params.kappa
-    theta = params.theta
-    sigma = params.sigma
-    rho = params.rho
-    v0 = params.v0
-
-    x0 = np.log(S0)
-
-    iu = 1j * u
-    a = kappa * theta
-    b = kappa
-
-    d = np.sqrt((rho * sigma * iu - b) ** 2 + (sigma ** 2) * (iu + u ** 2))
-    g = (b - rho * sigma * iu + d) / (b - rho * sigma * iu - d)
-
-    exp_dT = np.exp(d * T)
-    one_minus_gexp = 1.0 - g * exp_dT
-    one_minus_g = 1.0 - g
-
-    C = (
-        iu * (x0 + (r - q) * T)
-        + (a / (sigma ** 2)) * (
-            (b - rho * sigma * iu + d) * T
-            - 2.0 * np.log(one_minus_gexp / one_minus_g)
-        )
-    )
-    D = ((b - rho * sigma * iu + d) / (sigma ** 2)) * ((1.0 - exp_dT) / one_minus_gexp)
-
-    return np.exp(C + D * v0)
-
-
-def _heston_Pj(
-    j: int,
-    S0: float,
-    K: float,
-    T: float,
-    r: float,
-    q: float,
-    params: HestonParams,
-    u_max: float = 100.0,
-) -> float:
-    if j not in (1, 2):
-        raise ValueError("j must be 1 or 2")
-
-    logK = np.log(K)
-
-    def integrand(u: float) -> float:
-        u_complex = u - 1e-14j
-        if j == 1:
-            phi = heston_char_func(u_complex - 1j, T, S0, r, q, params)
-        else:
-            phi = heston_char_func(u_complex, T, S0, r, q, params)
-
-        num = np.exp(-1j * u_complex * logK) * phi
-        denom = 1j * u_complex
-        return np.real(num / denom)
-
-    from scipy.integrate import quad
-    integral, _ = quad(integrand, 0.0, u_max, limit=200)
-    return 0.5 + (1.0 / np.pi) * integral
-
-
-def heston_call_price_cf(
-    S0: float,
-    K: float,
-    T: float,
-    r: float,
-    q: float,
-    params: HestonParams,
-    u_max: float = 100.0,
-) -> float:
-    if T <= 0:
-        return max(S0 * np.exp(-q * T) - K * np.exp(-r * T), 0.0)
-
-    P1 = _heston_Pj(1, S0, K, T, r, q, params, u_max=u_max)
-    P2 = _heston_Pj(2, S0, K, T, r, q, params, u_max=u_max)
-
-    return float(S0 * np.exp(-q * T) * P1 - K * np.exp(-r * T) * P2)
-
+from equity.heston import HestonParams
+from equity.heston_analytic import heston_call_price_cf, heston_greeks_cf
 
 
 st.set_page_config(page_title="Option Pricing Lab", layout="wide")
@@ -277,27 +181,15 @@ if st.button("💡 Calculer prix, greeks et payoff"):
                 price = call_price - S0 * np.exp(-q * T) + K * np.exp(-r * T)
 
         # ------------------------------------------------------------
-        # Greeks (BS analytique, Heston numérique)
+        # Greeks (BS analytique, Heston différences finies sur la CF)
         # ------------------------------------------------------------
         if model_choice == "Black–Scholes":
             greeks = bs_greeks(S0, K, T, r, q, sigma, option_type)
         else:
-            def price_given_S_and_v0(S, v_init):
-                # Use same Heston params but with modified S or v0
-                params_tmp = HestonParams(
-                    kappa=params_heston.kappa,
-                    theta=params_heston.theta,
-                    sigma=params_heston.sigma,
-                    rho=params_heston.rho,
-                    v0=v_init,
-                )
-                call_p = heston_call_price_cf(S0=S, K=K, T=T, r=r, q=q, params=params_tmp)
-                if option_type == "Call":
-                    return call_p
-                else:
-                    return call_p - S * np.exp(-q * T) + K * np.exp(-r * T)
-
-            greeks = numerical_greeks(price_given_S_and_v0, S0, params_heston.v0)
+            # delta / gamma / vega (en v0) en une évaluation batchée de la CF
+            greeks = heston_greeks_cf(
+                S0, K, T, r, q, params_heston, option="call" if option_type == "Call" else "put"
+            )
 
         # ------------------------------------------------------------
         # Affichage des résultats
@@ -1,4 +1,5 @@
 import datetime as dt
+import time
 import numpy as np
 import streamlit as st
 
@@ -8,8 +9,9 @@ from volatility.vol_smile import smile_from_surface
 from volatility.sabr import calibrate_sabr_to_smile, sabr_implied_vol
 from volatility.svi import calibrate_svi_to_smile, svi_implied_vol
 from volatility.plots.smile_plots import plot_smile
-from equity.black_scholes import BlackScholesModel
+from equity.black_scholes import BlackScholesModel, implied_vol_batch
 from equity.heston import HestonParams, HestonModel
+from equity.heston_analytic import heston_call_prices
 from equity.calibration import calibrate_heston
 
 
@@ -81,6 +83,42 @@ with tab_sabr:
         ax.legend()
         st.pyplot(fig)
 
+    st.markdown("#### Surface SABR (toutes les maturités, forwards de la courbe)")
+    curve_name = st.text_input("Courbe de discount (vide = r plat)", value="USD_ZERO")
+    if st.button("Calibrer toute la surface SABR"):
+        from volatility.sabr_surface import calibrate_sabr_surface
+
+        curve = None
+        if curve_name:
+            try:
+                from market import RatesMarketData, RatesConfig
+                from rates.bootstrap_curve import bootstrap_from_zero_rates
+
+                raw_curve = RatesMarketData(cfg, RatesConfig(curve_name=curve_name)).raw_curve
+                curve = bootstrap_from_zero_rates(raw_curve, col_maturity="maturity", col_rate="rate",
+                                                  rate_is_continuous=True)
+            except Exception as e:
+                st.info(f"Courbe indisponible ({e}) : forwards au taux plat r = {r}.")
+
+        # les tranches déjà calibrées (même smile) sont relues depuis le cache
+        sabr_surf = calibrate_sabr_surface(surface, S0, curve=curve, r=r, beta=beta)
+        st.session_state["sabr_surface"] = sabr_surf
+        st.write(
+            f"Temps : {sabr_surf.elapsed:.3f} s — {len(sabr_surf.Ts)} maturités, "
+            f"dont {sabr_surf.n_cached} relues depuis le cache"
+        )
+        st.dataframe({"T": list(sabr_surf.rmse_by_T), "RMSE IV": list(sabr_surf.rmse_by_T.values())})
+
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots()
+        ax.plot(K, iv_mkt, "o", label="Marché")
+        ax.plot(K, sabr_surf.iv_at(K, T_choice), "-", label=f"Surface SABR (T={T_choice:.3f})")
+        ax.set_xlabel("K")
+        ax.set_ylabel("IV")
+        ax.legend()
+        st.pyplot(fig)
+
 with tab_svi:
     st.markdown("### Calibration SVI sur le smile")
     if st.button("Calibrer SVI"):
@@ -102,16 +140,64 @@ with tab_svi:
         ax.legend()
         st.pyplot(fig)
 
+    st.markdown("#### Surface SVI (toutes les maturités, sans arbitrage calendaire)")
+    n_workers_svi = st.number_input("Processus (1 = séquentiel, démarrage à chaud)", min_value=1, value=1, step=1)
+    if st.button("Calibrer toute la surface SVI"):
+        from volatility.svi_surface import calibrate_svi_surface
+
+        svi_surf = calibrate_svi_surface(surface, S0, r, n_workers=int(n_workers_svi))
+        st.session_state["svi_surface"] = svi_surf
+        st.write(f"Temps de calibration : {svi_surf.elapsed:.3f} s pour {len(svi_surf.Ts)} maturités")
+        st.dataframe({"T": list(svi_surf.rmse_by_T), "RMSE IV (pondérée vega)": list(svi_surf.rmse_by_T.values())})
+        if svi_surf.poor_fits:
+            st.warning(
+                f"{len(svi_surf.poor_fits)} tranche(s) mal ajustée(s) (RMSE > 1,5 vol) : "
+                f"{[round(T, 4) for T in svi_surf.poor_fits]}"
+            )
+        if svi_surf.calendar_fixes:
+            st.info(f"Arbitrage calendaire corrigé : {svi_surf.calendar_fixes}")
+
+        iv_model_surf = svi_surf.iv_at(K, T_choice)
+
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots()
+        ax.plot(K, iv_mkt, "o", label="Marché")
+        ax.plot(K, iv_model_surf, "-", label=f"Surface SVI (T={T_choice:.3f})")
+        ax.set_xlabel("K")
+        ax.set_ylabel("IV")
+        ax.legend()
+        st.pyplot(fig)
+
 with tab_heston:
-    st.markdown("### Calibration Heston (simple, via MC)")
+    st.markdown("### Calibration Heston (formule fermée, prix pondérés par la vega)")
 
     kappa = st.number_input("kappa", value=1.0)
     theta = st.number_input("theta", value=0.04)
     sigma_v = st.number_input("sigma (vol of vol)", value=0.5)
     rho = st.number_input("rho", value=-0.5)
     v0 = st.number_input("v0 (variance initiale)", value=0.04)
+    method_label = st.radio("Méthode", ["Formule fermée (CF)", "Monte Carlo (lent, approximatif)"], horizontal=True)
 
-    if st.button("Calibrer Heston (approximatif)"):
+    if st.button("Calibrer Heston"):
         initial = HestonParams(kappa=kappa, theta=theta, sigma=sigma_v, rho=rho, v0=v0)
-        params_heston = calibrate_heston(K, T_choice, iv_mkt, S0, r, initial=initial)
+        method = "cf" if method_label.startswith("Formule") else "mc"
+        t0 = time.perf_counter()
+        params_heston = calibrate_heston(K, T_choice, iv_mkt, S0, r, initial=initial, method=method)
+        elapsed = time.perf_counter() - t0
         st.write("Paramètres Heston calibrés :", params_heston)
+
+        prices_model = heston_call_prices(S0, K, T_choice, r, 0.0, params_heston)
+        iv_model_heston = implied_vol_batch(prices_model, S0, K, T_choice, r).iv
+        rmse = float(np.sqrt(np.nanmean((iv_model_heston - iv_mkt) ** 2)))
+        st.write(f"Temps de calibration : {elapsed:.3f} s — RMSE IV : {rmse:.5f}")
+
+        import matplotlib.pyplot as plt
+
+        fig, ax = plt.subplots()
+        ax.plot(K, iv_mkt, "o", label="Marché")
+        ax.plot(K, iv_model_heston, "-", label="Heston fit")
+        ax.set_xlabel("K")
+        ax.set_ylabel("IV")
+        ax.legend()
+        st.pyplot(fig)
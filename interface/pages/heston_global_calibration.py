@@ -0,0 +1,92 @@
+import datetime as dt
+import pandas as pd
+import streamlit as st
+import matplotlib.pyplot as plt
+
+from market import MarketConfig, DataMode, EquityConfig, EquityMarketData
+from volatility.vol_surface import VolSurface
+from equity.black_scholes import implied_vol_batch
+from equity.heston import HestonParams
+from equity.heston_analytic import heston_call_prices
+from equity.calibration import calibrate_heston_surface
+
+
+st.set_page_config(page_title="Heston Global Calibration", layout="wide")
+
+st.title("🌐 Calibration Heston globale (toutes maturités)")
+
+# --- Config globale ---
+if "market_config" not in st.session_state:
+    st.session_state["market_config"] = MarketConfig(
+        valuation_date=dt.date.today(),
+        mode=DataMode.SNAPSHOT,
+        currency="USD",
+        data_dir="data",
+    )
+
+cfg: MarketConfig = st.session_state["market_config"]
+
+ticker = st.text_input("Ticker", value="AAPL")
+
+# Il faut une surface déjà extraite (depuis la page 'Volatility Surface')
+surface: VolSurface = st.session_state.get("vol_surface", None)
+if surface is None:
+    st.warning(
+        "Aucune surface dans la session. Va d'abord dans la page 'Volatility Surface' "
+        "et clique sur 'Extraire surface'."
+    )
+    st.stop()
+
+eq_mkt = EquityMarketData(cfg, EquityConfig(ticker=ticker))
+S0 = eq_mkt.spot
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    r = st.number_input("Taux sans risque r", value=0.0, step=0.001)
+    q = st.number_input("Dividende continu q", value=0.0, step=0.001)
+with col2:
+    kappa = st.number_input("kappa initial", value=1.0)
+    theta = st.number_input("theta initial", value=0.04)
+    sigma_v = st.number_input("sigma initial (vol of vol)", value=0.5)
+with col3:
+    rho = st.number_input("rho initial", value=-0.5, min_value=-0.99, max_value=0.99, step=0.01)
+    v0 = st.number_input("v0 initial", value=0.04)
+    n_workers = st.number_input("Processus (par maturité)", value=1, min_value=1, max_value=32, step=1)
+
+st.write(f"Maturités dans la surface : {len(surface.maturities)} — points : {len(surface.raw)}")
+
+if st.button("Calibrer Heston sur toute la surface"):
+    initial = HestonParams(kappa=kappa, theta=theta, sigma=sigma_v, rho=rho, v0=v0)
+    try:
+        result = calibrate_heston_surface(surface, S0, r, q, initial=initial, n_workers=int(n_workers))
+    except Exception as e:
+        st.error(f"Erreur lors de la calibration : {e}")
+        st.stop()
+
+    st.subheader("📌 Paramètres calibrés")
+    st.write(result.params)
+
+    colA, colB = st.columns(2)
+    colA.metric("Temps de calibration", f"{result.elapsed:.3f} s")
+    colB.metric("Évaluations de la surface", f"{result.n_evals}")
+
+    st.subheader("📏 RMSE en vol implicite par maturité")
+    rmse_df = pd.DataFrame({"T": list(result.rmse_by_T.keys()), "RMSE IV": list(result.rmse_by_T.values())})
+    st.dataframe(rmse_df)
+
+    st.subheader("📈 Smiles marché vs Heston")
+    fig, ax = plt.subplots()
+    for T in result.rmse_by_T:
+        smile = surface.smile(T)
+        K = smile["K"].to_numpy(dtype=float)
+        iv_mkt = smile["iv"].to_numpy(dtype=float)
+        prices = heston_call_prices(S0, K, T, r, q, result.params)
+        iv_model = implied_vol_batch(prices, S0, K, T, r, q).iv
+        line = ax.plot(K, iv_model, "-", label=f"T={T:.3f}")[0]
+        ax.plot(K, iv_mkt, "o", color=line.get_color(), markersize=3)
+    ax.set_xlabel("K")
+    ax.set_ylabel("IV")
+    ax.legend()
+    st.pyplot(fig)
+else:
+    st.info("Renseigne les paramètres initiaux puis clique sur le bouton.")
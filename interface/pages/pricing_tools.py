@@ -5,7 +5,13 @@ import numpy as np
 from market import MarketConfig, DataMode, EquityConfig, EquityMarketData
 from equity.black_scholes import BlackScholesModel
 from equity.heston import HestonParams, HestonModel
-from equity.monte_carlo import monte_carlo_pricer, european_call_payoff, european_put_payoff
+from equity.mc_greeks import heston_mc_greeks
+from equity.american import american_mc, crr_price
+from equity.monte_carlo import (
+    streaming_monte_carlo_pricer,
+    european_call_payoff,
+    european_put_payoff,
+)
 
 
 st.set_page_config(page_title="Pricing Tools", layout="wide")
@@ -43,17 +49,21 @@ with tab_bs:
     q = st.number_input("Dividende q", value=0.0, min_value=0.0, max_value=0.2)
 
     bs = BlackScholesModel(spot=S0, rate=r, volatility=sigma, dividend_yield=q)
-    call_price = bs.call_price(K, T)
-    put_price = bs.put_price(K, T)
-    delta_call = bs.delta(K, T, option="call")
-    delta_put = bs.delta(K, T, option="put")
-    gamma = bs.gamma(K, T)
-    vega = bs.vega(K, T)
+    res_bs = bs.chain(K, T)
+    call_price = float(res_bs.call)
+    put_price = float(res_bs.put)
+    delta_call = float(res_bs.delta_call)
+    delta_put = float(res_bs.delta_put)
+    gamma = float(res_bs.gamma)
+    vega = float(res_bs.vega)
 
     colp1, colp2 = st.columns(2)
     with colp1:
         st.metric("Call price", f"{call_price:.4f}")
         st.metric("Put price", f"{put_price:.4f}")
+        # Chaînes AAPL américaines : le put européen sous-estime la prime d'exercice anticipé
+        am_put = crr_price(S0, K, T, r, sigma, q, option="put", american=True, N=1000)
+        st.metric("Put américain (CRR, 1000 pas)", f"{am_put:.4f}", delta=f"{am_put - put_price:+.4f} vs européen")
     with colp2:
         st.write(
             {
@@ -78,13 +88,92 @@ with tab_heston:
         v0 = st.number_input("v0 (variance initiale)", value=0.04)
         n_paths = st.number_input("N_paths", value=5000, min_value=1000, max_value=50000, step=1000)
 
+    colh4, colh5, colh6 = st.columns(3)
+    with colh4:
+        scheme_label = st.selectbox("Schéma de variance", ["QE (Andersen)", "Euler"])
+    with colh5:
+        default_steps = 20 if scheme_label.startswith("QE") else 200
+        n_steps = st.number_input("N_steps", value=default_steps, min_value=1, max_value=1000, step=10)
+    with colh6:
+        target_se = st.number_input(
+            "Erreur standard cible (0 = N_paths fixe)", value=0.0, min_value=0.0, step=0.01, format="%.4f"
+        )
+
+    colh7, colh8, colh9 = st.columns(3)
+    with colh7:
+        use_antithetic = st.checkbox("Variables antithétiques", value=False)
+    with colh8:
+        use_control = st.checkbox("Variable de contrôle (BS)", value=False, disabled=target_se > 0)
+    with colh9:
+        sampler_label = st.selectbox("Tirages", ["Pseudo-aléatoire", "Sobol + pont brownien (QMC)"])
+        use_qmc = sampler_label.startswith("Sobol")
+        # incompatible avec la variable de contrôle (espérance BS fermée biaisée)
+        use_mm = st.checkbox("Moment matching", value=False, disabled=use_qmc or use_control)
+    n_workers = st.number_input(
+        "Processus MC (pseudo-aléatoire, sans contrôle ni moment matching)",
+        value=1, min_value=1, max_value=32, step=1, disabled=target_se > 0,
+    )
+
+    show_american = st.checkbox("Put américain (Longstaff–Schwartz)", value=False)
+    show_greeks = st.checkbox("Greeks MC (pathwise delta/gamma, vega v0 en nombres aléatoires communs)", value=False)
+
     if st.button("Pricer Call & Put Heston MC"):
         params = HestonParams(kappa=kappa, theta=theta, sigma=sigma_v, rho=rho, v0=v0)
         heston = HestonModel(S0, r, params)
-        S_paths, _ = heston.simulate_paths(T, N_steps=200, N_paths=int(n_paths))
-
-        res_call = monte_carlo_pricer(S_paths, lambda S: european_call_payoff(S, K), r, T)
-        res_put = monte_carlo_pricer(S_paths, lambda S: european_put_payoff(S, K), r, T)
+        scheme = "qe" if scheme_label.startswith("QE") else "euler"
+        payoffs = {
+            "call": lambda S: european_call_payoff(S, K),
+            "put": lambda S: european_put_payoff(S, K),
+        }
+        if target_se > 0:
+            # Flux de blocs : on s'arrête dès que l'erreur standard cible est atteinte
+            # (N_paths sert alors de plafond).
+            blocks = heston.iter_path_blocks(
+                T, N_steps=int(n_steps), N_paths=int(n_paths), block_size=1000, scheme=scheme,
+                observation_steps=[int(n_steps)], antithetic=use_antithetic, moment_matching=use_mm,
+            )
+            res = streaming_monte_carlo_pricer(
+                blocks, payoffs, r, T, target_stderr=target_se, antithetic=use_antithetic
+            )
+            res_call, res_put = res["call"], res["put"]
+        elif n_workers > 1 and not (use_control or use_qmc or use_mm):
+            # Trajectoires réparties sur plusieurs processus (un flux aléatoire par fragment de
+            # taille fixe : le prix ne dépend pas du nombre de processus)
+            res = heston.price_european_mc_parallel(
+                K, T, "both", N_steps=int(n_steps), N_paths=int(n_paths), scheme=scheme,
+                n_workers=int(n_workers), antithetic=use_antithetic,
+            )
+            res_call, res_put = res["call"], res["put"]
+        else:
+            # Valeurs terminales seulement, avec réduction de variance optionnelle
+            vr_kwargs = dict(
+                N_steps=int(n_steps), N_paths=int(n_paths), scheme=scheme, control_variate=use_control,
+                sampler="sobol" if use_qmc else "pseudo",
+                antithetic=use_antithetic and not use_qmc, moment_matching=use_mm and not (use_qmc or use_control),
+            )
+            res_call = heston.price_european_mc(K, T, option="call", **vr_kwargs)
+            res_put = heston.price_european_mc(K, T, option="put", **vr_kwargs)
 
         st.write("Call Heston MC:", res_call)
         st.write("Put Heston MC:", res_put)
+
+        if show_american:
+            am = american_mc(
+                heston, K, T, "put", n_exercise=int(n_steps), N_steps=int(n_steps), N_paths=int(n_paths),
+                scheme=scheme,
+            )
+            st.write(f"Put américain Heston (Longstaff–Schwartz, {int(n_steps)} dates d'exercice) :", am)
+
+        if show_greeks:
+            # Delta / gamma pathwise sur une simulation, vega (v0) par nombres aléatoires communs
+            greeks_rows = {}
+            for opt in ("call", "put"):
+                g = heston_mc_greeks(
+                    heston, K, T, opt, N_steps=int(n_steps), N_paths=int(n_paths), scheme=scheme
+                )
+                greeks_rows[opt] = {
+                    name: f"{float(getattr(g, name).price):.4f} ± {float(getattr(g, name).stderr):.4f}"
+                    for name in ("delta", "gamma", "vega")
+                }
+            st.write("Greeks Heston MC (vega par unité de v0) :")
+            st.table(greeks_rows)
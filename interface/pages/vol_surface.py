@@ -1,7 +1,7 @@
 import datetime as dt
 import streamlit as st
 
-from market import MarketConfig, DataMode, EquityConfig
+from market import MarketConfig, DataMode, EquityConfig, EquityMarketData
 from volatility.extract_surface import SurfaceExtractionConfig, extract_vol_surface
 from volatility.vol_surface import VolSurface
 from volatility.vol_smile import smile_from_surface
@@ -32,6 +32,18 @@ with col1:
 with col2:
     min_iv = st.number_input("Min IV filter", min_value=0.0, max_value=1.0, value=0.0001, step=0.0001)
 
+interpolation = st.selectbox(
+    "Interpolation en strike (variance totale ; svi recommandé avant Dupire, "
+    "pchip = interpolant exact sans garantie d'arbitrage)",
+    options=["linear", "pchip", "svi"],
+    index=0,
+)
+calendar_floor = st.checkbox(
+    "Plancher calendaire sur la variance totale (supprime l'arbitrage calendaire, "
+    "mais déplace des points cotés)",
+    value=False,
+)
+
 extract_conf = SurfaceExtractionConfig(
     ticker=ticker,
     max_maturities=max_mats,
@@ -45,7 +57,18 @@ if st.button("Extraire surface"):
         st.success(f"Surface extraite ({len(surf_df)} points).")
         st.dataframe(surf_df.head())
 
-        surface = VolSurface(surf_df)
+        spot = EquityMarketData(cfg, EquityConfig(ticker=ticker)).spot
+        surface = VolSurface(
+            surf_df, interpolation=interpolation, spot=spot, calendar_arbitrage_free=calendar_floor
+        )
+        if surface.fallbacks:
+            fallback = {
+                round(T, 4): m for T, m in zip(surface.maturities, surface.slice_methods) if m != interpolation
+            }
+            st.info(
+                f"{len(surface.fallbacks)}/{len(surface.maturities)} tranches en repli "
+                f"(SVI mal ajusté ou trop peu de strikes) : {fallback}"
+            )
 
         st.subheader("📈 Smile pour une maturité choisie")
         T_choice = st.selectbox(
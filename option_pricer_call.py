@@ -2,7 +2,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import norm
-from scipy.optimize import brentq
+
+from equity.black_scholes import implied_vol_batch
 
 # -----------------------------
 # Classe Parameters
@@ -40,12 +41,9 @@ class Option:
         return norm.cdf(d1) if self.option_type == "call" else norm.cdf(d1)-1
 
     def implied_vol(self, market_price):
-        def f(sigma):
-            return self.black_scholes_price(sigma) - market_price
-        try:
-            return brentq(f, 1e-6, 5)
-        except:
-            return np.nan
+        res = implied_vol_batch(market_price, self.params.S0, self.K, self.params.T, self.params.r,
+                                option=self.option_type)
+        return float(res.iv)
 
 # -----------------------------
 # Classe Call et Put
@@ -109,9 +107,9 @@ puts_csv = pd.read_csv("data/puts.csv")
 # Paramètres marché
 params = Parameters(S0=170, r=0.05, T=30/365)
 
-# Calcul volatilité implicite pour chaque call
-calls_csv['impliedVol'] = calls_csv.apply(
-    lambda row: Call(row['strike'], params).implied_vol(row['lastPrice']), axis=1)
+# Calcul volatilité implicite pour tous les calls en une inversion vectorisée
+calls_csv['impliedVol'] = implied_vol_batch(
+    calls_csv['lastPrice'].to_numpy(), params.S0, calls_csv['strike'].to_numpy(), params.T, params.r).iv
 
 # Calcul prix BS et delta
 calls_csv['BS_price'] = calls_csv.apply(
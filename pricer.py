@@ -1,7 +1,8 @@
 # pricer.py
 import numpy as np
 from scipy.stats import norm
-from scipy.optimize import brentq
+
+from equity.black_scholes import implied_vol_batch
 
 
 class Pricer:
@@ -36,13 +37,26 @@ class Pricer:
     # ---------------------------
     @staticmethod
     def implied_vol(option, market_price):
-        def f(sigma):
-            return Pricer.bs_price(option, sigma) - market_price
+        params = option.params
+        res = implied_vol_batch(market_price, params.S0, option.K, params.T, params.r,
+                                option=option.option_type)
+        return float(res.iv)
 
-        try:
-            return brentq(f, 1e-6, 5)   # solve f(sigma)=0
-        except:
-            return np.nan
+    @staticmethod
+    def implied_vols(options, market_prices):
+        """
+        Vols implicites d'une liste d'options en une seule inversion vectorisée.
+        Renvoie (ivs, masque de convergence).
+        """
+        res = implied_vol_batch(
+            np.asarray(market_prices, dtype=float),
+            np.array([o.params.S0 for o in options]),
+            np.array([o.K for o in options]),
+            np.array([o.params.T for o in options]),
+            np.array([o.params.r for o in options]),
+            option=np.array([o.option_type for o in options]),
+        )
+        return res.iv, res.converged
 
     # ---------------------------
     # Greeks
@@ -2,9 +2,7 @@
 import matplotlib.pyplot as plt
 import glob
 import pandas as pd
-from parameters import Parameters
-from option import Call
-from pricer import Pricer
+from equity.black_scholes import implied_vol_batch
 from plots import SurfacePlot
 
 # Paramètres marché
@@ -26,17 +24,10 @@ for file in all_calls_files:
     T = (pd.to_datetime(exp_date) - pd.Timestamp.today()).days / 365
     expirations.append(T)
 
-    params = Parameters(S0=S0, r=r, T=T)
-    vols = []
-    for K in strikes:
-        row = df[df['strike'] == K]
-        if not row.empty:
-            market_price = row['lastPrice'].values[0]
-            opt = Call(K, params)
-            sigma = Pricer.implied_vol(opt, market_price)
-            vols.append(sigma)
-        else:
-            vols.append(float('nan'))
+    # Une seule inversion vectorisée par fichier, puis alignement sur la grille de strikes
+    iv_res = implied_vol_batch(df['lastPrice'].to_numpy(), S0, df['strike'].to_numpy(), T, r)
+    iv_by_strike = pd.Series(iv_res.iv, index=df['strike']).groupby(level=0).first()
+    vols = iv_by_strike.reindex(strikes).to_numpy()
 
     vol_matrix.append(vols)
 
@@ -5,6 +5,7 @@ import numpy as np
 from parameters import Parameters
 from option import Call
 from pricer import Pricer
+from equity.black_scholes import implied_vol_batch
 from plots import PayoffPlot, SmilePlot
 
 # Charger les données
@@ -16,14 +17,6 @@ params = Parameters(S0=170, r=0.05, T=30/365)
 # ---- Fonctions sécurisées (évite NaN, prix nuls, divisions impossibles) ----
 
 
-def safe_implied_vol(row):
-    price = row.get("lastPrice", np.nan)
-    if np.isnan(price) or price <= 0:
-        return np.nan
-    opt = Call(row["strike"], params)
-    return Pricer.implied_vol(opt, price)
-
-
 def safe_bs_price(row):
     if np.isnan(row["impliedVol"]):
         return np.nan
@@ -38,8 +31,10 @@ def safe_delta(row):
     return Pricer.delta(opt, row["impliedVol"])
 
 
-# ---- Calcul vol implicite ----
-calls["impliedVol"] = calls.apply(safe_implied_vol, axis=1)
+# ---- Calcul vol implicite (toute la chaîne en une inversion vectorisée) ----
+# Les prix nuls/NaN ou hors bornes d'arbitrage ressortent en NaN (converged=False).
+iv_res = implied_vol_batch(calls["lastPrice"].to_numpy(), params.S0, calls["strike"].to_numpy(), params.T, params.r)
+calls["impliedVol"] = iv_res.iv
 
 # ---- Calcul prix théorique + delta ----
 calls["BS_price"] = calls.apply(safe_bs_price, axis=1)
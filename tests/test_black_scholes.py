@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from equity.black_scholes import BlackScholesModel, bs_price, implied_vol_batch
+
+
+def test_implied_vol_round_trip():
+    rng = np.random.default_rng(0)
+    n = 2000
+    K = rng.uniform(50, 200, n)
+    T = rng.uniform(0.05, 5.0, n)
+    sigma = rng.uniform(0.05, 1.0, n)
+    option = np.where(rng.random(n) < 0.5, "call", "put")
+    price = np.where(option == "call", bs_price(100.0, K, T, 0.02, sigma, 0.01, "call"),
+                     bs_price(100.0, K, T, 0.02, sigma, 0.01, "put"))
+
+    res = implied_vol_batch(price, 100.0, K, T, 0.02, 0.01, option=option)
+    assert res.converged.mean() > 0.99
+    c = res.converged
+    repriced = np.where(option == "call", bs_price(100.0, K, T, 0.02, res.iv, 0.01, "call"),
+                        bs_price(100.0, K, T, 0.02, res.iv, 0.01, "put"))
+    # critère de convergence en prix : |prix - cible| <= tol S e^{-qT} max(1, sqrt T)
+    price_tol = 1e-8 * 100.0 * np.exp(-0.01 * T) * np.maximum(1.0, np.sqrt(T))
+    assert np.all(np.abs(repriced - price)[c] <= price_tol[c])
+
+
+def test_implied_vol_outside_arbitrage_bounds_is_nan():
+    K = np.array([100.0, 100.0])
+    price = np.array([-1.0, 200.0])   # sous l'intrinsèque, au-dessus de S
+    res = implied_vol_batch(price, 100.0, K, 1.0, 0.0)
+    assert np.all(np.isnan(res.iv))
+    assert not res.converged.any()
+
+
+def test_implied_vol_unreachable_price_tol_is_not_converged():
+    K = np.array([80.0, 100.0, 150.0])
+    price = bs_price(100.0, K, 1.0, 0.02, 0.25)
+    res = implied_vol_batch(price, 100.0, K, 1.0, 0.02, price_tol=1e-12)
+    np.testing.assert_allclose(res.iv[res.converged], 0.25, atol=1e-8)
+
+
+def test_terminal_distribution_matches_lognormal():
+    model = BlackScholesModel(100.0, 0.03, 0.2, 0.01)
+    S_T = model.simulate_terminal(1.0, N_steps=4, N_paths=200000, seed=1)
+    log_ret = np.log(S_T / 100.0)
+    assert log_ret.mean() == pytest.approx(0.03 - 0.01 - 0.02, abs=3 * 0.2 / np.sqrt(200000))
+    assert log_ret.std() == pytest.approx(0.2, rel=0.01)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from equity.black_scholes import bs_price
+from equity.cos_pricer import bs_cos_prices, heston_cos_prices
+from equity.heston import HestonParams
+from equity.heston_analytic import (
+    carr_madan_call_prices,
+    heston_call_prices,
+    heston_call_prices_fft_at,
+    heston_char_func,
+    heston_moment_explosion_time,
+)
+
+PARAMS = HestonParams(kappa=1.5, theta=0.04, sigma=0.5, rho=-0.6, v0=0.05)
+STRIKES = np.array([70.0, 90.0, 100.0, 110.0, 140.0])
+
+
+def test_bs_cos_matches_closed_form():
+    cos = bs_cos_prices(100.0, STRIKES, 0.75, 0.03, 0.25, 0.01)
+    np.testing.assert_allclose(cos, bs_price(100.0, STRIKES, 0.75, 0.03, 0.25, 0.01), atol=1e-8)
+
+
+@pytest.mark.parametrize("T", [0.1, 1.0, 5.0])
+def test_heston_lewis_cos_fft_agree(T):
+    lewis = np.ravel(heston_call_prices(100.0, STRIKES, T, 0.02, 0.0, PARAMS))
+    cos = heston_cos_prices(100.0, STRIKES, T, 0.02, 0.0, PARAMS)
+    fft = heston_call_prices_fft_at(100.0, STRIKES, T, 0.02, 0.0, PARAMS)
+    np.testing.assert_allclose(cos, lewis, atol=1e-5)
+    np.testing.assert_allclose(fft, lewis, atol=1e-5)
+
+
+def test_heston_lewis_put_call_parity_and_bs_limit():
+    # vol de vol quasi nulle, v0 = theta : Heston -> Black–Scholes de vol sqrt(theta)
+    flat = HestonParams(kappa=1.0, theta=0.04, sigma=1e-4, rho=0.0, v0=0.04)
+    lewis = np.ravel(heston_call_prices(100.0, STRIKES, 1.0, 0.02, 0.0, flat))
+    np.testing.assert_allclose(lewis, bs_price(100.0, STRIKES, 1.0, 0.02, 0.2), atol=1e-4)
+
+
+def test_fft_reduces_alpha_past_moment_explosion():
+    params = HestonParams(kappa=0.5, theta=0.09, sigma=1.0, rho=-0.3, v0=0.09)
+    T = 10.0
+    assert heston_moment_explosion_time(2.5, params) < T
+    lewis = np.ravel(heston_call_prices(100.0, STRIKES, T, 0.03, 0.0, params))
+    fft = heston_call_prices_fft_at(100.0, STRIKES, T, 0.03, 0.0, params)
+    np.testing.assert_allclose(fft, lewis, atol=1e-4)
+
+
+def test_fft_raises_when_alpha_would_be_too_small():
+    params = HestonParams(kappa=1.0, theta=0.04, sigma=1.0, rho=0.5, v0=0.04)
+    with pytest.raises(ValueError):
+        heston_call_prices_fft_at(100.0, STRIKES, 10.0, 0.03, 0.0, params)
+
+
+def test_carr_madan_rejects_infinite_moment():
+    params = HestonParams(kappa=0.5, theta=0.09, sigma=1.0, rho=-0.3, v0=0.09)
+
+    def cf(u):
+        return heston_char_func(u, 10.0, 100.0, 0.03, 0.0, params)
+
+    with pytest.raises(ValueError):
+        carr_madan_call_prices(cf, 100.0, 10.0, 0.03, 0.0, alpha=1.5)
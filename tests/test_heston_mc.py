@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from equity.heston import HestonModel, HestonParams
+from equity.heston_analytic import heston_call_prices, heston_greeks_cf
+from equity.mc_greeks import heston_mc_greeks
+from equity.path_payoffs import AsianObserver
+
+PARAMS = HestonParams(kappa=1.0, theta=0.04, sigma=0.5, rho=-0.5, v0=0.04)
+MODEL = HestonModel(100.0, 0.03, PARAMS)
+
+
+def test_qe_price_matches_cf():
+    res = MODEL.price_european_mc(100.0, 1.0, N_steps=20, N_paths=100000, scheme="qe", seed=1)
+    exact = float(np.ravel(heston_call_prices(100.0, 100.0, 1.0, 0.03, 0.0, PARAMS))[0])
+    assert abs(res.price - exact) <= 4 * res.stderr
+
+
+@pytest.mark.parametrize("K", [90.0, 110.0, 120.0])
+def test_conditional_gamma_unbiased_at_page_defaults(K):
+    # QE, 20 pas : le gamma conditionné sur le dernier pas seul était biaisé de 4 à 13 SE
+    g = heston_mc_greeks(MODEL, K, 0.5, "call", N_steps=20, N_paths=50000, seed=1, scheme="qe")
+    exact = heston_greeks_cf(100.0, K, 0.5, 0.03, 0.0, PARAMS)["gamma"]
+    assert abs(g.gamma.price - exact) <= 4 * g.gamma.stderr
+
+
+def test_antithetic_greeks_use_pair_means():
+    g = heston_mc_greeks(MODEL, 100.0, 0.5, "put", N_steps=20, N_paths=20000, seed=1, scheme="qe",
+                         antithetic=True)
+    assert g.delta.variance_reduction is not None
+
+
+def test_moment_matching_reports_variance_reduction():
+    res = MODEL.price_european_mc(100.0, 1.0, N_steps=20, N_paths=20000, scheme="qe", moment_matching=True)
+    assert res.variance_reduction is not None and res.variance_reduction > 0
+
+
+def test_moment_matching_with_control_variate_is_rejected():
+    with pytest.raises(ValueError):
+        MODEL.price_european_mc(100.0, 1.0, N_steps=10, N_paths=1000, control_variate=True, moment_matching=True)
+
+
+def test_parallel_price_does_not_depend_on_worker_count():
+    kwargs = dict(N_steps=10, N_paths=8000, scheme="qe", seed=3, shard_size=2000)
+    one = MODEL.price_european_mc_parallel(100.0, 1.0, n_workers=1, **kwargs)
+    two = MODEL.price_european_mc_parallel(100.0, 1.0, n_workers=2, **kwargs)
+    assert one.price == pytest.approx(two.price, rel=1e-12)
+
+
+def test_simulation_driver_outputs_are_consistent():
+    S, v = MODEL.simulate_paths(1.0, N_steps=12, N_paths=500, seed=2, scheme="qe", observation_steps=[0, 6, 12])
+    assert S.shape == v.shape == (500, 3)
+    assert np.all(S[:, 0] == 100.0) and np.all(v[:, 0] == PARAMS.v0)
+    S_T, v_T = MODEL.simulate_terminal(1.0, N_steps=12, N_paths=500, seed=2, scheme="qe")
+    np.testing.assert_array_equal(S_T, S[:, -1])
+    np.testing.assert_array_equal(v_T, v[:, -1])
+
+    asian = AsianObserver(100.0)
+    S_obs, _ = MODEL.simulate_observed(1.0, N_steps=12, N_paths=500, observers=[asian], seed=2, scheme="qe")
+    np.testing.assert_array_equal(S_obs, S_T)
+    full, _ = MODEL.simulate_paths(1.0, N_steps=12, N_paths=500, seed=2, scheme="qe")
+    np.testing.assert_allclose(asian.payoff(), np.maximum(full[:, 1:].mean(axis=1) - 100.0, 0.0))
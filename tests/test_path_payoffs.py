@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from equity.american import american_mc, crr_price
+from equity.black_scholes import BlackScholesModel, bs_price
+from equity.path_payoffs import AsianObserver, BarrierObserver, DigitalObserver, price_path_dependent
+
+S0, R, Q, SIGMA, T = 100.0, 0.03, 0.01, 0.25, 1.0
+MODEL = BlackScholesModel(S0, R, SIGMA, Q)
+
+
+def _within(res, exact, n_se=4.0):
+    return abs(res.price - exact) <= n_se * res.stderr
+
+
+def geometric_asian_call(K, N):
+    # moyenne géométrique discrète des dates 1..N : ln G gaussien
+    m = np.log(S0) + (R - Q - 0.5 * SIGMA**2) * T * (N + 1) / (2 * N)
+    v = SIGMA**2 * T * (N + 1) * (2 * N + 1) / (6 * N**2)
+    d1 = (m - np.log(K) + v) / np.sqrt(v)
+    return np.exp(-R * T) * (np.exp(m + 0.5 * v) * norm.cdf(d1) - K * norm.cdf(d1 - np.sqrt(v)))
+
+
+def down_and_out_call(K, H):
+    # barrière continue, K > H
+    lam = (R - Q + 0.5 * SIGMA**2) / SIGMA**2
+    sig_sqrtT = SIGMA * np.sqrt(T)
+    y = np.log(H**2 / (S0 * K)) / sig_sqrtT + lam * sig_sqrtT
+    down_in = (S0 * np.exp(-Q * T) * (H / S0) ** (2 * lam) * norm.cdf(y)
+               - K * np.exp(-R * T) * (H / S0) ** (2 * lam - 2) * norm.cdf(y - sig_sqrtT))
+    return bs_price(S0, K, T, R, SIGMA, Q) - down_in
+
+
+@pytest.fixture(scope="module")
+def observed():
+    observers = {
+        "asian": AsianObserver(100.0, kind="geometric"),
+        "digital": DigitalObserver(105.0),
+        "do": BarrierObserver(100.0, 85.0, "down-and-out"),
+        "di": BarrierObserver(100.0, 85.0, "down-and-in"),
+    }
+    return price_path_dependent(MODEL, observers, T, N_steps=50, N_paths=100000, seed=7)
+
+
+def test_geometric_asian_matches_closed_form(observed):
+    assert _within(observed["asian"], geometric_asian_call(100.0, 50))
+
+
+def test_digital_matches_closed_form(observed):
+    d2 = (np.log(S0 / 105.0) + (R - Q - 0.5 * SIGMA**2) * T) / (SIGMA * np.sqrt(T))
+    assert _within(observed["digital"], np.exp(-R * T) * norm.cdf(d2))
+
+
+def test_bridge_corrected_barrier_matches_continuous_formula(observed):
+    assert _within(observed["do"], down_and_out_call(100.0, 85.0))
+    # in + out = vanille, trajectoire par trajectoire
+    vanilla = bs_price(S0, 100.0, T, R, SIGMA, Q)
+    assert observed["do"].price + observed["di"].price == pytest.approx(vanilla, abs=0.1)
+
+
+def test_lsm_put_close_to_crr():
+    crr = float(crr_price(S0, 100.0, T, R, SIGMA, Q, option="put", american=True))
+    lsm = american_mc(MODEL, 100.0, T, "put", n_exercise=50, N_paths=50000, seed=3)
+    # Bermudéenne à 50 dates, borne basse : légèrement sous l'américaine
+    assert crr - 0.08 <= lsm.price <= crr + 3 * lsm.stderr
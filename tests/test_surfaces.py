@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from equity.local_vol import compute_local_vol_surface
+from volatility.sabr import SABRParams, calibrate_sabr_to_smile, sabr_implied_vol_batch
+from volatility.sabr_surface import calibrate_sabr_surface, clear_sabr_cache
+from volatility.svi import SVIParams, fit_svi_total_variance, svi_butterfly_g, svi_total_variance
+from volatility.svi_surface import calibrate_svi_surface
+from volatility.vol_surface import VolSurface
+
+SPOT, R = 100.0, 0.02
+MATURITIES = [0.1, 0.25, 0.5, 1.0, 2.0]
+STRIKES = np.linspace(70.0, 130.0, 25)
+
+
+def smile_df(noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for T in MATURITIES:
+        k = np.log(STRIKES / (SPOT * np.exp(R * T)))
+        iv = 0.2 - 0.1 * k / np.sqrt(T) + 0.3 * k**2 / np.sqrt(T) + noise * rng.standard_normal(k.size)
+        rows.append(pd.DataFrame({"T": T, "K": STRIKES, "iv": iv}))
+    return pd.concat(rows, ignore_index=True)
+
+
+# ---------------------------
+# VolSurface
+# ---------------------------
+
+@pytest.mark.parametrize("interpolation", ["linear", "pchip"])
+def test_quoted_points_round_trip(interpolation):
+    # bruit : des variances totales se croisent entre maturités, le plancher
+    # calendaire (désactivé par défaut) déplacerait ces noeuds
+    df = smile_df(noise=0.02, seed=1)
+    surface = VolSurface(df, interpolation=interpolation, spot=SPOT, r=R)
+    for T, grp in df.groupby("T"):
+        np.testing.assert_allclose(surface.iv_at(grp["K"].to_numpy(), T), grp["iv"].to_numpy(), atol=1e-12)
+
+
+def test_calendar_floor_makes_total_variance_increasing():
+    df = smile_df(noise=0.02, seed=1)
+    surface = VolSurface(df, calendar_arbitrage_free=True, spot=SPOT, r=R)
+    w = surface.grid(STRIKES, MATURITIES) ** 2 * np.asarray(MATURITIES)[:, None]
+    assert np.all(np.diff(w, axis=0) >= -1e-12)
+
+
+def test_zero_maturity_rows_are_dropped():
+    df = pd.concat([smile_df(), pd.DataFrame({"T": [0.0], "K": [100.0], "iv": [0.3]})], ignore_index=True)
+    assert min(VolSurface(df).maturities) > 0
+
+
+def test_svi_backend_fits_every_slice_without_local_vol_holes():
+    surface = VolSurface(smile_df(noise=0.003), interpolation="svi", spot=SPOT, r=R)
+    assert surface.slice_methods == ["svi"] * len(MATURITIES)
+    assert surface.fallbacks == []
+    lv = compute_local_vol_surface(surface, SPOT, R, n_T=10, n_K=20)
+    assert np.isfinite(lv.sigmas).all()
+
+
+def test_svi_backend_reports_fallbacks():
+    df = smile_df()
+    bad = df["T"] == 0.5
+    df.loc[bad, "iv"] = 0.2 + 0.3 * np.random.default_rng(0).random(bad.sum())
+    surface = VolSurface(df, interpolation="svi", spot=SPOT, r=R)
+    assert surface.fallbacks == [0.5]
+    assert surface.slice_methods[MATURITIES.index(0.5)] == "pchip"
+
+
+# ---------------------------
+# SVI
+# ---------------------------
+
+def test_svi_fit_recovers_arbitrage_free_slice():
+    true = SVIParams(a=0.01, b=0.1, rho=-0.4, m=0.02, sigma=0.15)
+    k = np.linspace(-0.5, 0.4, 30)
+    w = svi_total_variance(k, true)
+    fit = fit_svi_total_variance(k, w)
+    np.testing.assert_allclose(svi_total_variance(k, fit), w, atol=1e-6)
+    x = np.array([fit.a, fit.b, fit.rho, fit.m, fit.sigma])
+    assert svi_butterfly_g(np.linspace(-1.0, 1.0, 101), x)[0].min() >= -1e-6
+
+
+def test_butterfly_jacobian_matches_finite_differences():
+    k = np.linspace(-1.0, 0.5, 9)
+    x = np.array([-0.01, 0.2, -0.8, -0.1, 0.15])
+    _, jac = svi_butterfly_g(k, x)
+    h = 1e-7
+    fd = np.column_stack([(svi_butterfly_g(k, x + h * e)[0] - svi_butterfly_g(k, x - h * e)[0]) / (2 * h)
+                          for e in np.eye(5)])
+    np.testing.assert_allclose(jac, fd, atol=1e-6)
+
+
+def test_svi_surface_is_calendar_ordered_and_flags_poor_fits():
+    surface = VolSurface(smile_df(noise=0.003))
+    svi = calibrate_svi_surface(surface, SPOT, R)
+    k = np.linspace(-0.4, 0.3, 41)
+    W = np.vstack([svi_total_variance(k, p) for p in svi.params])
+    assert np.all(np.diff(W, axis=0) >= -1e-12)
+    assert svi.poor_fits == []
+    assert max(svi.rmse_by_T.values()) < 0.01
+    assert np.isfinite(svi.iv_at(100.0, 0.0))
+
+    strict = calibrate_svi_surface(surface, SPOT, R, rmse_tol=1e-6)
+    assert strict.poor_fits == list(strict.rmse_by_T)
+
+
+# ---------------------------
+# SABR
+# ---------------------------
+
+def sabr_df(params):
+    rows = []
+    for T in MATURITIES:
+        F = SPOT * np.exp(R * T)
+        rows.append(pd.DataFrame({"T": T, "K": STRIKES, "iv": sabr_implied_vol_batch(F, STRIKES, T, params)}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_sabr_smile_calibration_recovers_parameters():
+    true = SABRParams(alpha=0.25, beta=0.5, rho=-0.3, nu=0.6)
+    F, T = 100.0, 1.0
+    fit = calibrate_sabr_to_smile(STRIKES, sabr_implied_vol_batch(F, STRIKES, T, true), F=F, T=T, beta=0.5)
+    assert (fit.alpha, fit.rho, fit.nu) == pytest.approx((0.25, -0.3, 0.6), abs=1e-3)
+
+
+def test_sabr_surface_cache_returns_copies():
+    clear_sabr_cache()
+    surface = VolSurface(sabr_df(SABRParams(alpha=2.0, beta=0.5, rho=-0.3, nu=0.6)))
+    first = calibrate_sabr_surface(surface, SPOT, r=R)
+    assert first.n_cached == 0
+    assert max(first.rmse_by_T.values()) < 1e-4
+
+    first.params[0].alpha = -1.0
+    second = calibrate_sabr_surface(surface, SPOT, r=R)
+    assert second.n_cached == len(MATURITIES)
+    assert second.params[0].alpha > 0
@@ -12,11 +12,7 @@ def plot_vol_surface(surface: VolSurface, n_T: int = 20, n_K: int = 50):
     Ks = np.linspace(K_min, K_max, n_K)
 
     TT, KK = np.meshgrid(Ts, Ks, indexing="ij")
-    IV = np.zeros_like(TT)
-
-    for i in range(TT.shape[0]):
-        for j in range(TT.shape[1]):
-            IV[i, j] = surface.iv_at(KK[i, j], TT[i, j])
+    IV = surface.grid(Ks, Ts)
 
     fig = plt.figure()
     ax = fig.add_subplot(111, projection="3d")
@@ -68,6 +68,37 @@ def sabr_implied_vol(
     return (num / den) * A * (1 + B)
 
 
+def sabr_implied_vol_batch(F, K, T, params: SABRParams, epsilon: float = 1e-07) -> np.ndarray:
+    """
+    Version vectorisée de sabr_implied_vol : F, K, T et les champs de
+    params (scalaires ou tableaux) sont broadcastés ensemble, ce qui
+    permet d'évaluer une surface avec des paramètres différents par point.
+    Même formule de Hagan, NaN là où les entrées sont invalides.
+    """
+    F, K, T = (np.asarray(x, dtype=float) for x in (F, K, T))
+    alpha, beta, rho, nu = (np.asarray(x, dtype=float) for x in (params.alpha, params.beta, params.rho, params.nu))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logFK = np.log(F / K)
+        FK_beta = (F * K) ** ((1 - beta) / 2)
+
+        z = (nu / alpha) * FK_beta * logFK
+        x_z = np.log((np.sqrt(1 - 2 * rho * z + z ** 2) + z - rho) / (1 - rho))
+        # z / x(z) -> 1 à la monnaie
+        ratio = np.where(np.abs(F - K) < epsilon, 1.0, z / x_z)
+
+        A = 1 + ((1 - beta) ** 2 / 24) * logFK ** 2 + ((1 - beta) ** 4 / 1920) * logFK ** 4
+        B = (
+            ((1 - beta) ** 2 / 24) * (alpha ** 2 / (F ** (2 - 2 * beta)))
+            + (rho * beta * nu * alpha / (4 * F ** (1 - beta)))
+            + ((2 - 3 * rho ** 2) * nu ** 2 / 24)
+        ) * T
+
+        iv = alpha / FK_beta * ratio * A * (1 + B)
+    valid = (F > 0) & (K > 0) & (T > 0) & (alpha > 0)
+    return np.where(valid, iv, np.nan)
+
+
 def calibrate_sabr_to_smile(
     K: np.ndarray,
     iv: np.ndarray,
@@ -93,8 +124,7 @@ def calibrate_sabr_to_smile(
     def residuals(x):
         a, r, n = x
         params = SABRParams(alpha=max(a, 1e-6), beta=beta, rho=np.tanh(r), nu=max(n, 1e-6))
-        model_iv = np.array([sabr_implied_vol(F, k, T, params) for k in K])
-        return model_iv - iv
+        return sabr_implied_vol_batch(F, K, T, params) - iv
 
     x0 = np.array([initial_alpha, initial_rho, initial_nu])
     res = least_squares(residuals, x0, method="trf")
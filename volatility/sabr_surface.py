@@ -0,0 +1,184 @@
+import hashlib
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from rates.discount_factors import DiscountCurve
+from .sabr import SABRParams, calibrate_sabr_to_smile, sabr_implied_vol_batch
+from .vol_surface import VolSurface
+
+
+# ---------------------------
+# Forwards
+# ---------------------------
+
+def discount_factors(T, curve: Optional[DiscountCurve] = None, r: float = 0.0) -> np.ndarray:
+    """
+    DF(0, T) vectorisé : lu sur la courbe si elle est fournie (une
+    interpolation par maturité distincte), sinon exp(-r T).
+    """
+    T = np.asarray(T, dtype=float)
+    if curve is None:
+        return np.exp(-r * T)
+    T_unique, inverse = np.unique(T, return_inverse=True)
+    dfs = np.array([curve.df(t) for t in T_unique])
+    return dfs[inverse].reshape(T.shape)
+
+
+def forward_prices(spot: float, T, curve: Optional[DiscountCurve] = None, r: float = 0.0,
+                   q: float = 0.0) -> np.ndarray:
+    """F_T = spot e^{-q T} / DF(0, T)."""
+    T = np.asarray(T, dtype=float)
+    return spot * np.exp(-q * T) / discount_factors(T, curve, r)
+
+
+# ---------------------------
+# Cache des calibrations par tranche
+# ---------------------------
+
+_FIT_CACHE: Dict[str, SABRParams] = {}
+_FIT_CACHE_SIZE = 256
+
+
+def smile_key(K: np.ndarray, iv: np.ndarray, F: float, T: float, beta: float) -> str:
+    """
+    Empreinte d'un smile : strikes, vols, forward, maturité et beta.
+    Deux snapshots identiques donnent la même clé.
+    """
+    h = hashlib.sha1()
+    for x in (K, iv, [F, T, beta]):
+        h.update(np.ascontiguousarray(x, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _fit_slice_cached(K: np.ndarray, iv: np.ndarray, F: float, T: float, beta: float):
+    """
+    calibrate_sabr_to_smile mémoïsé sur smile_key. Le cache est au niveau
+    du module : il survit aux réexécutions d'une page Streamlit dans le
+    même processus. Renvoie (params, trouvé_en_cache) ; params est une
+    copie, modifier la surface ne peut pas altérer le cache.
+    """
+    key = smile_key(K, iv, F, T, beta)
+    if key in _FIT_CACHE:
+        return replace(_FIT_CACHE[key]), True
+    params = calibrate_sabr_to_smile(K, iv, F=F, T=T, beta=beta)
+    if len(_FIT_CACHE) >= _FIT_CACHE_SIZE:
+        _FIT_CACHE.pop(next(iter(_FIT_CACHE)))
+    _FIT_CACHE[key] = params
+    return replace(params), False
+
+
+def clear_sabr_cache() -> None:
+    _FIT_CACHE.clear()
+
+
+# ---------------------------
+# Surface SABR
+# ---------------------------
+
+@dataclass
+class SABRSurface:
+    """
+    Un jeu SABR (beta commun) par maturité, les forwards venant de la
+    courbe de discount (ou d'un taux plat r).
+
+    Entre deux maturités, alpha, rho et nu sont interpolés linéairement
+    en T ; hors de la grille, les paramètres de la tranche au bord sont
+    gardés. iv_at évalue Hagan en un seul appel vectorisé.
+    """
+    Ts: np.ndarray
+    params: List[SABRParams]
+    spot: float
+    curve: Optional[DiscountCurve] = None
+    r: float = 0.0
+    q: float = 0.0
+    rmse_by_T: dict = field(default_factory=dict)
+    n_cached: int = 0
+    elapsed: float = 0.0
+
+    def __post_init__(self):
+        self._alpha = np.array([p.alpha for p in self.params], dtype=float)
+        self._rho = np.array([p.rho for p in self.params], dtype=float)
+        self._nu = np.array([p.nu for p in self.params], dtype=float)
+        self.beta = float(self.params[0].beta)
+
+    def forward(self, T) -> np.ndarray:
+        return forward_prices(self.spot, T, self.curve, self.r, self.q)
+
+    def params_at(self, T) -> SABRParams:
+        """Paramètres interpolés en T (champs de la forme de T)."""
+        T = np.asarray(T, dtype=float)
+        return SABRParams(
+            alpha=np.interp(T, self.Ts, self._alpha),
+            beta=self.beta,
+            rho=np.interp(T, self.Ts, self._rho),
+            nu=np.interp(T, self.Ts, self._nu),
+        )
+
+    def iv_at(self, K, T):
+        """
+        Vol implicite SABR, vectorisée (broadcasting de K et T) ; float
+        pour des entrées scalaires.
+        """
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+        iv = sabr_implied_vol_batch(self.forward(T), K, T, self.params_at(T))
+        return float(iv) if iv.ndim == 0 else iv
+
+    def grid(self, Ks, Ts) -> np.ndarray:
+        """Matrice (len(Ts) × len(Ks)) des vols implicites."""
+        Ks = np.atleast_1d(np.asarray(Ks, dtype=float))
+        Ts = np.atleast_1d(np.asarray(Ts, dtype=float))
+        return self.iv_at(Ks[None, :], Ts[:, None])
+
+
+def calibrate_sabr_surface(
+    surface: VolSurface,
+    spot: float,
+    curve: Optional[DiscountCurve] = None,
+    r: float = 0.0,
+    q: float = 0.0,
+    beta: float = 0.5,
+    min_points: int = 4,
+) -> SABRSurface:
+    """
+    Calibre calibrate_sabr_to_smile sur chaque maturité de la surface,
+    au forward F_T = spot e^{-qT} / DF(0, T).
+
+    Chaque tranche passe par le cache (clé = empreinte du smile) : une
+    surface déjà vue n'est pas recalibrée, seules les tranches modifiées
+    le sont. Les maturités avec moins de min_points strikes sont ignorées.
+    """
+    t0 = time.perf_counter()
+    Ts, params, rmse_by_T = [], [], {}
+    n_cached = 0
+    for T in surface.maturities:
+        smile = surface.smile(T)
+        K = smile["K"].to_numpy(dtype=float)
+        iv = smile["iv"].to_numpy(dtype=float)
+        ok = np.isfinite(iv) & (iv > 0) & (K > 0)
+        if ok.sum() < min_points or T <= 0:
+            continue
+        K, iv = K[ok], iv[ok]
+        F = float(forward_prices(spot, T, curve, r, q))
+        p, hit = _fit_slice_cached(K, iv, F, float(T), beta)
+        n_cached += hit
+
+        Ts.append(float(T))
+        params.append(p)
+        rmse_by_T[float(T)] = float(np.sqrt(np.nanmean((sabr_implied_vol_batch(F, K, T, p) - iv) ** 2)))
+    if not Ts:
+        raise ValueError(f"Aucune maturité avec au moins {min_points} points valides.")
+
+    return SABRSurface(
+        Ts=np.array(Ts),
+        params=params,
+        spot=spot,
+        curve=curve,
+        r=r,
+        q=q,
+        rmse_by_T=rmse_by_T,
+        n_cached=n_cached,
+        elapsed=time.perf_counter() - t0,
+    )
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 from scipy.optimize import least_squares
@@ -66,3 +66,172 @@ def calibrate_svi_to_smile(
         sigma=max(sigma_fit, 1e-6),
     )
     return params_fit
+
+
+# ---------------------------
+# Calibration bornée en variance totale
+# ---------------------------
+
+def svi_bounds(k: np.ndarray, w: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bornes de (a, b, rho, m, sigma) déduites de la tranche : b <= 4
+    (pente des ailes de w bornée par Roger Lee), m et sigma à l'échelle
+    de l'étendue des strikes. Sans elles, le problème glisse vers la
+    direction dégénérée b -> inf, rho -> -1, m -> -inf (aile linéaire).
+    """
+    span = max(k.max() - k.min(), 0.1)
+    lower = np.array([-w.max(), 0.0, -0.999, k.min() - span, 1e-4])
+    upper = np.array([w.max(), 4.0, 0.999, k.max() + span, 2.0 * span])
+    return lower, upper
+
+
+def svi_initial_guess(k: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Point de départ (a, b, rho, m, sigma) à partir des données seules."""
+    return np.array([0.5 * w.min(), 0.1, -0.3, k[np.argmin(w)], 0.1])
+
+
+def svi_vega_weights(k: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """
+    Vega Black–Scholes relative (max 1) de chaque strike, évaluée au
+    niveau de variance totale à la monnaie (médiane des 5 strikes les plus
+    proches de k = 0) plutôt qu'à la vol cotée : une vol aberrante (cotation
+    périmée dans la monnaie) ne gonfle pas son propre poids.
+    """
+    w_atm = np.median(w[np.argsort(np.abs(k))[:5]])
+    sw = np.sqrt(max(w_atm, 1e-12))
+    v = np.exp(-0.5 * (-k / sw + 0.5 * sw) ** 2)
+    return v / v.max()
+
+
+def svi_fit_weights(k: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """
+    Poids des résidus en variance totale pour un ajustement pondéré par
+    la vega en vol : d sigma = dw / (2 sqrt(w T)), T constant sur la
+    tranche, d'où sqrt(vega) / sqrt(w) (normalisé, max 1).
+    """
+    wt = np.sqrt(svi_vega_weights(k, w) / np.maximum(w, 1e-12))
+    return wt / wt.max()
+
+
+def svi_vega_rmse(k: np.ndarray, w: np.ndarray, T: float, params: SVIParams) -> float:
+    """RMSE en vol implicite pondérée par svi_vega_weights."""
+    v = svi_vega_weights(k, w)
+    iv_fit = np.sqrt(np.maximum(svi_total_variance(k, params), 0.0) / T)
+    return float(np.sqrt(np.sum(v * (iv_fit - np.sqrt(w / T)) ** 2) / v.sum()))
+
+
+def _svi_w_and_jac(k: np.ndarray, x: np.ndarray):
+    """Variance totale SVI et sa jacobienne en (a, b, rho, m, sigma)."""
+    a, b, rho, m, sigma = x
+    km = k - m
+    R = np.sqrt(km**2 + sigma**2)
+    w = a + b * (rho * km + R)
+    jac = np.column_stack([np.ones_like(k), rho * km + R, b * km, -b * (rho + km / R), b * sigma / R])
+    return w, jac
+
+
+def svi_butterfly_g(k: np.ndarray, x: np.ndarray):
+    """
+    Fonction g(k) de Gatheral–Jacquier et sa jacobienne en
+    (a, b, rho, m, sigma) :
+        g = (1 - k w' / (2w))^2 - w'^2 / 4 (1/w + 1/4) + w'' / 2,
+    densité risque-neutre positive (pas d'arbitrage papillon) ssi g >= 0.
+    C'est aussi, au facteur près, le dénominateur de Dupire en variance
+    totale : g < 0 donne les trous NaN de la volatilité locale.
+    """
+    a, b, rho, m, sigma = x
+    u = k - m
+    R = np.sqrt(u**2 + sigma**2)
+    w, dw = _svi_w_and_jac(k, x)
+    w = np.maximum(w, 1e-8)
+    w1 = b * (rho + u / R)
+    w2 = b * sigma**2 / R**3
+    zeros = np.zeros_like(k)
+    dw1 = np.column_stack([zeros, rho + u / R, b * np.ones_like(k), -b * sigma**2 / R**3, -b * u * sigma / R**3])
+    dw2 = np.column_stack([
+        zeros, sigma**2 / R**3, zeros, 3 * b * sigma**2 * u / R**5, b * (2 * sigma / R**3 - 3 * sigma**3 / R**5)
+    ])
+
+    A = 1 - k * w1 / (2 * w)
+    g = A**2 - 0.25 * w1**2 * (1 / w + 0.25) + 0.5 * w2
+    dA = -0.5 * k[:, None] * (dw1 / w[:, None] - (w1 / w**2)[:, None] * dw)
+    dg = (
+        2 * A[:, None] * dA
+        - 0.5 * (w1 * (1 / w + 0.25))[:, None] * dw1
+        + 0.25 * (w1**2 / w**2)[:, None] * dw
+        + 0.5 * dw2
+    )
+    return g, dg
+
+
+def fit_svi_total_variance(
+    k: np.ndarray,
+    w: np.ndarray,
+    x0: Optional[np.ndarray] = None,
+    k_grid: Optional[np.ndarray] = None,
+    w_floor: Optional[np.ndarray] = None,
+    calendar_weight: float = 100.0,
+    weights: Optional[np.ndarray] = None,
+    max_nfev: int = 100,
+    k_butterfly: Optional[np.ndarray] = None,
+    butterfly_weight: float = 0.1,
+) -> SVIParams:
+    """
+    Moindres carrés SVI bornés sur une tranche, en variance totale
+    w = sigma_imp^2 T et log-moneyness forward k (jacobienne analytique) :
+      - résidus w_SVI(k) - w_marché(k) ;
+      - pénalité de positivité sur le minimum a + b sigma sqrt(1 - rho^2) ;
+      - si w_floor est fourni (variance d'une autre tranche sur k_grid),
+        pénalité calendaire max(0, w_floor - w_SVI) ;
+      - pénalité papillon max(0, -g(k)) sur k_butterfly (svi_butterfly_g),
+        par défaut l'étendue des strikes élargie de moitié de chaque côté
+        (butterfly_weight = 0 la désactive).
+    x0 : départ (a, b, rho, m, sigma), par défaut svi_initial_guess.
+    weights : multiplicateurs des résidus de données (svi_fit_weights pour
+      une pondération par la vega), 1 par défaut.
+    max_nfev : le fond de vallée SVI est plat ; au-delà d'une centaine
+      d'évaluations, la RMSE ne bouge plus.
+    """
+    k = np.asarray(k, dtype=float)
+    w = np.asarray(w, dtype=float)
+    wt = np.ones_like(w) if weights is None else np.asarray(weights, dtype=float)
+    if k_butterfly is None:
+        span = max(k.max() - k.min(), 0.1)
+        k_butterfly = np.linspace(k.min() - 0.5 * span, k.max() + 0.5 * span, 41)
+
+    def min_variance(x):
+        a, b, rho, m, sigma = x
+        c = np.sqrt(1.0 - rho**2)
+        return a + b * sigma * c, np.array([1.0, sigma * c, -b * sigma * rho / c, 0.0, b * c])
+
+    def residuals(x):
+        model, _ = _svi_w_and_jac(k, x)
+        res = [wt * (model - w), [10.0 * max(0.0, -min_variance(x)[0])]]
+        if w_floor is not None:
+            model_grid, _ = _svi_w_and_jac(k_grid, x)
+            res.append(calendar_weight * np.maximum(w_floor - model_grid, 0.0))
+        if butterfly_weight > 0:
+            g, _ = svi_butterfly_g(k_butterfly, x)
+            res.append(butterfly_weight * np.maximum(-g, 0.0))
+        return np.concatenate(res)
+
+    def jacobian(x):
+        _, J = _svi_w_and_jac(k, x)
+        w_min, dw_min = min_variance(x)
+        rows = [wt[:, None] * J, (-10.0 * dw_min if w_min < 0 else np.zeros(5))[None, :]]
+        if w_floor is not None:
+            model_grid, J_grid = _svi_w_and_jac(k_grid, x)
+            active = (w_floor - model_grid > 0)[:, None]
+            rows.append(np.where(active, -calendar_weight * J_grid, 0.0))
+        if butterfly_weight > 0:
+            g, dg = svi_butterfly_g(k_butterfly, x)
+            rows.append(np.where((g < 0)[:, None], -butterfly_weight * dg, 0.0))
+        return np.vstack(rows)
+
+    lower, upper = svi_bounds(k, w)
+    x0 = svi_initial_guess(k, w) if x0 is None else np.asarray(x0, dtype=float)
+    x0 = np.clip(x0, lower + 1e-6, upper - 1e-6)
+    x = least_squares(residuals, x0, jac=jacobian, bounds=(lower, upper), method="trf", x_scale="jac",
+                      max_nfev=max_nfev).x
+    a, b, rho, m, sigma = x
+    return SVIParams(a=a, b=b, rho=rho, m=m, sigma=sigma)
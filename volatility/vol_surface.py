@@ -1,9 +1,13 @@
 from dataclasses import dataclass
+from functools import partial
 from typing import List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 import bisect
+from scipy.interpolate import PchipInterpolator
+
+from .svi import fit_svi_total_variance, svi_fit_weights, svi_total_variance, svi_vega_rmse
 
 
 @dataclass
@@ -19,26 +23,148 @@ class VolPoint:
     iv: float
 
 
+# ---------------------------
+# Interpolation en strike (par maturité), en variance totale
+# ---------------------------
+
+INTERPOLATIONS = ("linear", "pchip", "svi")
+
+
+def _linear_total_var(K, Ks, IVs, T):
+    # linéaire en vol, plat hors des strikes cotés
+    return np.interp(K, Ks, IVs) ** 2 * T
+
+
+def _pchip_total_var(K, spline, lo, hi):
+    # cubique monotone en ln K, plat hors des strikes cotés
+    return spline(np.clip(np.log(K), lo, hi))
+
+
+def _svi_total_var(K, params, F):
+    return np.maximum(svi_total_variance(np.log(K / F), params), 1e-12)
+
+
+def _slice_interpolator(method: str, Ks: np.ndarray, IVs: np.ndarray, T: float, F: float, svi_tol: float):
+    """
+    K -> variance totale w(K) pour une maturité, coefficients précalculés.
+    Renvoie (fonction, backend effectivement utilisé).
+
+    Les strikes dupliqués sont moyennés pour pchip / svi. svi est ajusté
+    en variance totale et log-moneyness k = ln(K/F) par moindres carrés
+    bornés, pondérés par la vega (les vols aberrantes loin de la monnaie,
+    typiquement des cotations périmées dans la monnaie, pèsent peu) ; il
+    retombe sur linear avec moins de 5 strikes, et sur pchip si la RMSE en
+    vol pondérée par la vega dépasse svi_tol.
+    """
+    if method not in INTERPOLATIONS:
+        raise ValueError(f"Interpolation inconnue : {method} (choix : {list(INTERPOLATIONS)})")
+    if method == "linear" or len(Ks) < 2:
+        return partial(_linear_total_var, Ks=Ks, IVs=IVs, T=T), "linear"
+    K_u, inv = np.unique(Ks, return_inverse=True)
+    iv_u = np.bincount(inv, weights=IVs) / np.bincount(inv)
+    if len(K_u) < 2:
+        return partial(_linear_total_var, Ks=Ks, IVs=IVs, T=T), "linear"
+    if method == "svi":
+        if len(K_u) < 5:
+            return partial(_linear_total_var, Ks=Ks, IVs=IVs, T=T), "linear"
+        k, w = np.log(K_u / F), iv_u**2 * T
+        params = fit_svi_total_variance(k, w, weights=svi_fit_weights(k, w))
+        if svi_vega_rmse(k, w, T, params) <= svi_tol:
+            return partial(_svi_total_var, params=params, F=F), "svi"
+    x = np.log(K_u)
+    return partial(_pchip_total_var, spline=PchipInterpolator(x, iv_u**2 * T), lo=x[0], hi=x[-1]), "pchip"
+
+
 class VolSurface:
     """
-    Surface de volatilité implicite discrète, avec interpolation bilinéaire simple.
+    Surface de volatilité implicite discrète : interpolation en strike par
+    maturité (backend au choix), linéaire en variance totale entre
+    maturités.
 
     On stocke les données sous forme de DataFrame avec colonnes:
       - 'T' (maturité en années)
       - 'K' (strike)
       - 'iv' (implied volatility en décimal)
       - optionnel: 'maturity_str' (pour info)
+
+    interpolation :
+      - "linear" : linéaire en vol entre strikes cotés, plate au-delà ;
+      - "pchip"  : cubique monotone (PCHIP) de la variance totale en ln K,
+                   sans dépassement ni coude aux noeuds. Interpolant
+                   exact des données : aucune garantie d'absence
+                   d'arbitrage en strike, et sur un smile bruité la
+                   convexité locale donne autant (voire plus) de trous
+                   NaN dans Dupire que linear ;
+      - "svi"    : une paramétrisation SVI par maturité, ajustée en
+                   variance totale et log-moneyness forward (ailes
+                   linéaires, lisse : c'est le backend à utiliser avant
+                   Dupire). Une tranche mal ajustée (RMSE en vol
+                   pondérée par la vega > svi_tol) retombe sur pchip ;
+                   slice_methods donne le backend retenu pour chaque
+                   maturité, fallbacks les maturités en repli.
+    spot, r, q : forwards F_T = spot e^{(r-q) T} de la log-moneyness SVI ;
+      sans spot, la moyenne géométrique des strikes sert de référence
+      (décalage de k absorbé par le paramètre m).
+    calendar_arbitrage_free : la variance totale des maturités est rendue
+      croissante en T à strike fixé (maximum cumulé), ce qui supprime
+      l'arbitrage calendaire de l'interpolation entre maturités. Désactivé
+      par défaut : le plancher déplace les points cotés d'une maturité
+      dont la variance passe sous celle de la précédente, qui ne sont
+      alors plus restitués par iv_at.
     """
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, interpolation: str = "linear", calendar_arbitrage_free: bool = False,
+                 spot: Optional[float] = None, r: float = 0.0, q: float = 0.0, svi_tol: float = 0.015):
         if not {"T", "K", "iv"}.issubset(df.columns):
             raise ValueError("df doit contenir les colonnes 'T', 'K', 'iv'.")
-        df = df.dropna(subset=["T", "K", "iv"]).copy()
+        df = df.dropna(subset=["T", "K", "iv"])
+        # une maturité nulle (échéance du jour) n'a pas de variance totale exploitable
+        df = df[(df["T"] > 0) & (df["K"] > 0)].copy()
         if df.empty:
             raise ValueError("Surface vide.")
         self._df = df
         # liste triée des maturités uniques
         self._Ts = sorted(df["T"].unique())
+        self.interpolation = interpolation
+        self.calendar_arbitrage_free = calendar_arbitrage_free
+        self._build_index()
+        if spot is None:
+            F = np.full(len(self._T_arr), np.exp(np.log(self._K_flat).mean()))
+        else:
+            F = spot * np.exp((r - q) * self._T_arr)
+        fitted = [
+            _slice_interpolator(interpolation, *self._slice(i), T, F[i], svi_tol) for i, T in enumerate(self._T_arr)
+        ]
+        self._slice_fns = [fn for fn, _ in fitted]
+        self.slice_methods: List[str] = [used for _, used in fitted]
+        self.fallbacks: List[float] = [
+            float(T) for T, used in zip(self._T_arr, self.slice_methods) if used != interpolation
+        ]
+
+    def _build_index(self) -> None:
+        """
+        Index construit une fois : strikes et IV triés par (T, K) dans deux
+        buffers contigus, la tranche de la maturité i étant
+        [offsets[i], offsets[i+1]). Les recherches se font ensuite par
+        searchsorted sur des tableaux NumPy, sans pandas.
+        """
+        T = self._df["T"].to_numpy(dtype=float)
+        K = self._df["K"].to_numpy(dtype=float)
+        iv = self._df["iv"].to_numpy(dtype=float)
+        order = np.lexsort((K, T))
+        self._T_arr = np.asarray(self._Ts, dtype=float)
+        self._K_flat = np.ascontiguousarray(K[order])
+        self._iv_flat = np.ascontiguousarray(iv[order])
+        self._offsets = np.searchsorted(T[order], self._T_arr, side="left")
+        self._offsets = np.append(self._offsets, len(order))
+
+    def _slice(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(strikes, IV) triés de la i-ème maturité (vues sur les buffers)."""
+        a, b = self._offsets[i], self._offsets[i + 1]
+        return self._K_flat[a:b], self._iv_flat[a:b]
+
+    def _T_index(self, T: float) -> int:
+        return int(np.searchsorted(self._T_arr, T))
 
     @property
     def raw(self) -> pd.DataFrame:
@@ -52,17 +178,15 @@ class VolSurface:
 
     def strikes_for_T(self, T: float) -> np.ndarray:
         """Renvoie les strikes disponibles pour la maturité la plus proche de T."""
-        T_near = self._nearest_T(T)
-        sub = self._df[self._df["T"] == T_near]
-        return np.sort(sub["K"].unique())
+        Ks, _ = self._slice(self._T_index(self._nearest_T(T)))
+        return np.unique(Ks)
 
     def smile(self, T: float) -> pd.DataFrame:
         """
         Renvoie un smile (DataFrame strike, iv) pour la maturité la plus proche de T.
         """
-        T_near = self._nearest_T(T)
-        sub = self._df[self._df["T"] == T_near].copy()
-        return sub[["K", "iv"]].sort_values("K")
+        Ks, IVs = self._slice(self._T_index(self._nearest_T(T)))
+        return pd.DataFrame({"K": Ks.copy(), "iv": IVs.copy()})
 
     def _nearest_T(self, T: float) -> float:
         """
@@ -77,45 +201,66 @@ class VolSurface:
         before, after = Ts[i - 1], Ts[i]
         return before if abs(T - before) <= abs(T - after) else after
 
-    def iv_at(self, K: float, T: float) -> float:
+    def iv_at(self, K, T):
         """
-        Approximates sigma(K, T) by bilinear interpolation on (T, K).
-        If outside the convex hull, performs edge extrapolation.
-        """
-        Ts = self._Ts
-        if T <= Ts[0]:
-            T1 = T2 = Ts[0]
-        elif T >= Ts[-1]:
-            T1 = T2 = Ts[-1]
-        else:
-            j = bisect.bisect_left(Ts, T)
-            T1, T2 = Ts[j - 1], Ts[j]
+        sigma(K, T) : variance totale de chaque maturité par le backend
+        d'interpolation en strike choisi (linear, pchip ou svi, voir la
+        classe), puis linéaire en variance totale sigma^2 T entre les deux
+        maturités encadrantes. Extrapolation plate en T hors de la grille ;
+        en strike, plate pour linear / pchip, ailes SVI pour svi.
 
-        iv_T1 = self._iv_at_T_slice(K, T1)
-        iv_T2 = self._iv_at_T_slice(K, T2)
+        K et T peuvent être des tableaux (broadcasting) ; renvoie un float
+        pour des entrées scalaires.
+        """
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+        slice_w = self._slice_total_var(K.ravel())                   # (n_T, n)
+        j1, j2, w = self._T_weights(T.ravel())
+        cols = np.arange(K.size)
+        iv = self._blend(slice_w[j1, cols], slice_w[j2, cols], j1, j2, w)
+        iv = iv.reshape(K.shape)
+        return float(iv) if iv.ndim == 0 else iv
 
-        if T1 == T2:
-            return iv_T1
+    def grid(self, Ks, Ts) -> np.ndarray:
+        """
+        Matrice (len(Ts) × len(Ks)) des vols implicites : une évaluation du
+        backend par maturité de la surface, puis une combinaison en variance totale.
+        """
+        Ks = np.atleast_1d(np.asarray(Ks, dtype=float))
+        Ts = np.atleast_1d(np.asarray(Ts, dtype=float))
+        slice_w = self._slice_total_var(Ks)
+        j1, j2, w = self._T_weights(Ts)
+        return self._blend(slice_w[j1], slice_w[j2], j1[:, None], j2[:, None], w[:, None])
 
-        w = (T - T1) / (T2 - T1)
-        return iv_T1 * (1 - w) + iv_T2 * w
+    def _slice_total_var(self, K: np.ndarray) -> np.ndarray:
+        """Variance totale de chaque maturité aux strikes K : (n_T, len(K))."""
+        W = np.vstack([fn(K) for fn in self._slice_fns])
+        if self.calendar_arbitrage_free:
+            W = np.maximum.accumulate(W, axis=0)
+        return W
 
-    def _iv_at_T_slice(self, K: float, T: float) -> float:
+    def _T_weights(self, T: np.ndarray):
         """
-        Interpolation 1D en strike pour une maturité fixée.
+        Indices des maturités encadrantes et poids de la seconde ;
+        T hors grille ramené au bord (poids nul).
         """
-        sub = self._df[self._df["T"] == T].sort_values("K")
-        Ks = sub["K"].to_numpy()
-        IVs = sub["iv"].to_numpy()
-
-        if K <= Ks[0]:
-            return IVs[0]
-        if K >= Ks[-1]:
-            return IVs[-1]
+        Ts = self._T_arr
+        if len(Ts) == 1:
+            zeros = np.zeros(T.shape, dtype=int)
+            return zeros, zeros, np.zeros(T.shape)
+        Tc = np.clip(T, Ts[0], Ts[-1])
+        j2 = np.clip(np.searchsorted(Ts, Tc), 1, len(Ts) - 1)
+        j1 = j2 - 1
+        w = (Tc - Ts[j1]) / (Ts[j2] - Ts[j1])
+        return j1, j2, w
 
-        i = bisect.bisect_left(Ks, K)
-        K1, K2 = Ks[i - 1], Ks[i]
-        iv1, iv2 = IVs[i - 1], IVs[i]
+    def _blend(self, w1, w2, j1, j2, w):
+        """Interpolation linéaire en variance totale entre deux maturités."""
+        T = (1 - w) * self._T_arr[j1] + w * self._T_arr[j2]
+        return np.sqrt(((1 - w) * w1 + w * w2) / T)
 
-        w = (K - K1) / (K2 - K1)
-        return iv1 * (1 - w) + iv2 * w
+    def _iv_at_T_slice(self, K, T: float):
+        """
+        Interpolation 1D en strike pour une maturité fixée (présente dans la surface).
+        """
+        i = self._T_index(T)
+        return np.sqrt(self._slice_fns[i](np.asarray(K, dtype=float)) / self._T_arr[i])